@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 from io import StringIO
 
+from backend.core.formatacao import formatar_moeda_brl_coluna
+from backend.core.consultas import IndiceCategorias
+
 # --- Configurações Iniciais da Página e Funções Auxiliares ---
 
 st.set_page_config(layout="wide", page_title="Calculadora PRO de Lotes")
@@ -13,6 +16,12 @@ def formatar_moeda_brl(valor):
     valor_formatado = f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
     return f"R$ {valor_formatado}"
 
+def formatar_coluna_moeda(serie):
+    """Formata uma coluna inteira de uma vez; mesmo resultado de formatar_moeda_brl célula a célula."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return formatar_moeda_brl_coluna(serie, texto_nulo="")
+    return serie.apply(formatar_moeda_brl)
+
 def parse_moeda(valor_str):
     """Converte uma string de moeda brasileira para um float."""
     if isinstance(valor_str, (int, float)):
@@ -55,7 +64,7 @@ def para_csv_download(df):
         df_export.rename(columns={'VALOR_A_VISTA': 'VALOR A VISTA'}, inplace=True)
     colunas_moeda = [col for col in df_export.columns if 'VALOR' in col or 'ENTRADA' in col or 'MENSAL' in col]
     for col in colunas_moeda:
-        df_export[col] = df_export[col].apply(formatar_moeda_brl)
+        df_export[col] = formatar_coluna_moeda(df_export[col])
     return df_export.to_csv(index=False, sep=';').encode('utf-8-sig')
 
 # --- Interface Principal (Título e Sidebar) ---
@@ -75,6 +84,9 @@ if arquivo_csv is not None:
     if 'df' not in st.session_state or st.session_state.get('nome_arquivo') != arquivo_csv.name:
         st.session_state.df = carregar_dados(arquivo_csv)
         st.session_state.nome_arquivo = arquivo_csv.name
+        # ETAPA/BLOCO não mudam depois da carga (o reajuste só altera valores)
+        if st.session_state.df is not None:
+            st.session_state.indice_categorias = IndiceCategorias(st.session_state.df)
         # Limpa resultados antigos ao carregar um novo arquivo
         if 'df_resultado' in st.session_state:
             del st.session_state.df_resultado
@@ -82,6 +94,9 @@ if arquivo_csv is not None:
 # --- Estrutura de Abas ---
 if 'df' in st.session_state and st.session_state.df is not None:
     df_original = st.session_state.df
+    if 'indice_categorias' not in st.session_state:
+        st.session_state.indice_categorias = IndiceCategorias(df_original)
+    indice_categorias = st.session_state.indice_categorias
 
     tab1, tab2 = st.tabs(["[ 1 ]  Tabela & Ajustes", "[ 2 ]  Simulação & Resultado"])
 
@@ -93,18 +108,18 @@ if 'df' in st.session_state and st.session_state.df is not None:
         st.subheader("Filtros")
         col_filtro1, col_filtro2 = st.columns(2)
         with col_filtro1:
-            etapas_unicas = ['Todas'] + sorted(df_original['ETAPA'].unique().tolist())
+            etapas_unicas = ['Todas'] + indice_categorias.valores('ETAPA')
             etapa_selecionada = st.selectbox("Filtrar por Etapa:", etapas_unicas)
         with col_filtro2:
-            blocos_unicos = ['Todos'] + sorted(df_original['BLOCO'].unique().tolist())
+            blocos_unicos = ['Todos'] + indice_categorias.valores('BLOCO')
             bloco_selecionado = st.selectbox("Filtrar por Bloco/Quadra:", blocos_unicos)
 
-        # Aplica os filtros
-        df_filtrado = df_original.copy()
-        if etapa_selecionada != 'Todas':
-            df_filtrado = df_filtrado[df_filtrado['ETAPA'] == etapa_selecionada]
-        if bloco_selecionado != 'Todos':
-            df_filtrado = df_filtrado[df_filtrado['BLOCO'] == bloco_selecionado]
+        # Aplica os filtros pelo índice de categorias, sem copiar a tabela
+        mascara = indice_categorias.mascara(
+            ETAPA=None if etapa_selecionada == 'Todas' else [etapa_selecionada],
+            BLOCO=None if bloco_selecionado == 'Todos' else [bloco_selecionado],
+        )
+        df_filtrado = df_original if mascara.all() else df_original[mascara]
 
         # --- REAJUSTE DE VALORES (DENTRO DE UM FORMULÁRIO) ---
         with st.expander("💰 Reajuste de Valores (Antes e Depois)"):
@@ -158,10 +173,8 @@ if 'df' in st.session_state and st.session_state.df is not None:
 
         if 'df_preview' in st.session_state:
             st.subheader("Prova Real do Reajuste")
-            df_preview_formatado = st.session_state.df_preview.copy()
-            for col in ['VALOR ATUAL', 'AJUSTE', 'NOVO VALOR']:
-                df_preview_formatado[col] = df_preview_formatado[col].apply(formatar_moeda_brl)
-            st.dataframe(df_preview_formatado, use_container_width=True)
+            # Colunas continuam numéricas (ordenação por valor); o R$ vem só na exibição
+            st.dataframe(st.session_state.df_preview.style.format(formatter=formatar_moeda_brl, subset=['VALOR ATUAL', 'AJUSTE', 'NOVO VALOR']), use_container_width=True)
             
             if st.button("✅ Confirmar e Aplicar Reajuste", type="primary"):
                 info = st.session_state.reajuste_info
@@ -0,0 +1,95 @@
+# Arquivo: backend/benchmarks/_dados.py
+# Geradores de tabelas sintéticas usados pelos benchmarks.
+
+import time
+import numpy as np
+import pandas as pd
+
+def gerar_lotes(n_lotes, seed=42):
+    rng = np.random.default_rng(seed)
+    valor = np.round(rng.uniform(80_000, 600_000, n_lotes), 2)
+    entrada = np.round(valor * rng.uniform(0, 0.3, n_lotes), 2)
+    return pd.DataFrame({
+        'ETAPA': rng.integers(1, 6, n_lotes).astype(str),
+        'BLOCO': np.char.add('Q', rng.integers(1, 60, n_lotes).astype(str)),
+        'UNIDADE': np.arange(1, n_lotes + 1).astype(str),
+        'VALOR_A_VISTA': valor,
+        'ENTRADA': entrada,
+    })
+
+def formatar_brl(valor):
+    return 'R$ ' + f'{valor:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+
+def gerar_csv_precos(n_lotes, seed=42):
+    """Planilha de preços como vem dos clientes: cabeçalhos alternativos, 'R$', vazios."""
+    df = gerar_lotes(n_lotes, seed)
+    rng = np.random.default_rng(seed)
+    entrada = np.array([formatar_brl(valor) for valor in df['ENTRADA']], dtype=object)
+    entrada[rng.random(n_lotes) < 0.05] = ''
+    df_csv = pd.DataFrame({
+        'FASE': df['ETAPA'],
+        'QUADRA': df['BLOCO'],
+        'LOTE': df['UNIDADE'].str.zfill(4),
+        'VALOR A VISTA (01/2025)': [formatar_brl(valor) for valor in df['VALOR_A_VISTA']],
+        'SINAL': entrada,
+    })
+    return df_csv.to_csv(sep=';', index=False)
+
+def cronometrar(funcao, *args, repeticoes=3, **kwargs):
+    """Retorna o menor tempo (em segundos) entre as repetições."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args, **kwargs)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+# Cabeçalhos alternativos aceitos pelo COLUMN_ALIASES (acentos, caixa, datas e parênteses são removidos).
+CABECALHOS_ALTERNATIVOS = {
+    'ETAPA': ['Fase', 'ETAPA'],
+    'BLOCO': ['Quadra', 'QD', 'Bloco'],
+    'UNIDADE': ['Lote', 'Número do Lote', 'Cód. Unidade'],
+    'VALOR_A_VISTA': ['Valor à Vista (01/2025)', 'PREÇO', 'Valor do Lote'],
+    'ENTRADA': ['Sinal', 'Ato', 'Valor de Entrada'],
+}
+
+def formatar_brl_baguncado(valores, rng, vazios=True):
+    """Moeda como aparece nas planilhas: com e sem 'R$', sem milhar, espaços, traços e células vazias."""
+    formatos = [
+        formatar_brl,
+        lambda valor: formatar_brl(valor).replace('R$ ', 'R$'),
+        lambda valor: f' {valor:.2f} '.replace('.', ','),
+        lambda valor: formatar_brl(valor)[3:],
+    ]
+    escolhas = rng.integers(0, len(formatos), len(valores))
+    textos = np.array([formatos[escolha](valor) for escolha, valor in zip(escolhas, valores)], dtype=object)
+    sorteio = rng.random(len(valores))
+    textos[sorteio < 0.01] = 'R$ -'
+    if vazios: textos[(sorteio >= 0.01) & (sorteio < 0.02)] = ''
+    return textos
+
+def gerar_csv_baguncado(n_lotes, seed=42):
+    """Planilha de preços com cabeçalhos sorteados entre os alternativos e moeda em formatos misturados."""
+    df = gerar_lotes(n_lotes, seed)
+    rng = np.random.default_rng(seed)
+    cabecalhos = {coluna: str(rng.choice(opcoes)) for coluna, opcoes in CABECALHOS_ALTERNATIVOS.items()}
+    df_csv = pd.DataFrame({
+        cabecalhos['ETAPA']: df['ETAPA'],
+        cabecalhos['BLOCO']: df['BLOCO'],
+        cabecalhos['UNIDADE']: df['UNIDADE'].str.zfill(6),
+        # Valor à vista vazio vira NaN (só a entrada tem valor padrão), então não há vazios nele
+        cabecalhos['VALOR_A_VISTA']: formatar_brl_baguncado(df['VALOR_A_VISTA'], rng, vazios=False),
+        cabecalhos['ENTRADA']: formatar_brl_baguncado(df['ENTRADA'], rng),
+    })
+    return df_csv.to_csv(sep=';', index=False)
+
+def gerar_csv_entradas(n_lotes, seed=7, fracao=0.5):
+    """Planilha de entradas para o merge: uma parte dos lotes de gerar_csv_baguncado, embaralhados."""
+    rng = np.random.default_rng(seed)
+    unidades = rng.permutation(n_lotes)[:int(n_lotes * fracao)] + 1
+    entradas = np.round(rng.uniform(1_000, 50_000, len(unidades)), 2)
+    df_csv = pd.DataFrame({
+        'LT': np.char.zfill(unidades.astype(str), 6),
+        'Valor do Sinal': formatar_brl_baguncado(entradas, rng),
+    })
+    return df_csv.to_csv(sep=';', index=False)
@@ -0,0 +1,54 @@
+# Arquivo: backend/benchmarks/bench_amortizacao.py
+# Tabela de amortização (Price/SAC) gerada em blocos: linhas por segundo, tempo
+# até o primeiro bloco e pico de memória (tracemalloc), que não deve crescer
+# com o número de lotes. Mede o cálculo sozinho (DataFrames), o CSV e o NDJSON.
+# O tracemalloc deixa o to_csv muitas vezes mais lento, então o tempo é medido
+# numa passada sem ele e o pico numa segunda passada, limitada aos primeiros blocos.
+# Uso (a partir de backend/): python -m benchmarks.bench_amortizacao [n_lotes_calculo]
+
+import sys
+import time
+import tracemalloc
+from itertools import islice
+
+from core.amortizacao import gerar_amortizacao, gerar_csv_amortizacao, gerar_ndjson_amortizacao
+from core.calculator import NOMES_PADRAO
+from benchmarks._dados import gerar_lotes
+
+PRAZO_ANOS = 40
+TAXA_JUROS_ANUAL = 9.5
+# O cálculo roda sobre os 100 mil lotes (48 milhões de linhas); a serialização, sobre uma parte.
+N_LOTES_CALCULO = 100_000
+N_LOTES_SERIALIZACAO = 5_000
+# Um milhão de linhas: passa por mais de um bloco de cálculo (LINHAS_POR_CALCULO).
+BLOCOS_MEMORIA = 50
+
+def medir(nome, blocos, tamanho):
+    inicio = time.perf_counter()
+    primeiro = None
+    linhas = 0
+    for bloco in blocos():
+        if primeiro is None: primeiro = time.perf_counter() - inicio
+        linhas += tamanho(bloco)
+    duracao = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    for _ in islice(blocos(), BLOCOS_MEMORIA): pass
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nome:<24} {linhas:>11} {'linhas' if nome.startswith('cálculo') else 'bytes':<6} primeiro bloco {primeiro:6.3f}s  "
+          f"total {duracao:7.2f}s  ({linhas / duracao / 1e6:5.2f} M/s)  pico {pico / 2**20:6.1f} MiB")
+
+def main():
+    n_lotes_calculo = int(sys.argv[1]) if len(sys.argv) > 1 else N_LOTES_CALCULO
+    print(f"{PRAZO_ANOS * 12} meses, taxa {TAXA_JUROS_ANUAL}% a.a.")
+    for n_lotes in sorted({N_LOTES_SERIALIZACAO, n_lotes_calculo}):
+        df_lotes = gerar_lotes(n_lotes)
+        for sistema in ('price', 'sac'):
+            medir(f'cálculo {sistema} {n_lotes}', lambda: gerar_amortizacao(df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL, sistema), len)
+    df_lotes = gerar_lotes(N_LOTES_SERIALIZACAO)
+    medir(f'csv price {N_LOTES_SERIALIZACAO}', lambda: gerar_csv_amortizacao(df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL, 'price', NOMES_PADRAO), len)
+    medir(f'ndjson price {N_LOTES_SERIALIZACAO}', lambda: gerar_ndjson_amortizacao(df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL, 'price'), len)
+
+if __name__ == '__main__':
+    main()
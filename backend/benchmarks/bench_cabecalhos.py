@@ -0,0 +1,69 @@
+# Arquivo: backend/benchmarks/bench_cabecalhos.py
+# Micro-benchmark da resolução de cabeçalhos: normalização com re.sub a cada
+# chamada + busca linear nos aliases contra o cache + índice de aliases
+# (só o mapeamento dos nomes, sem o custo de renomear o DataFrame).
+# Uso (a partir de backend/): python -m benchmarks.bench_cabecalhos
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from core.calculator import COLUMN_ALIASES, process_dataframe, resolver_colunas
+from benchmarks._dados import cronometrar
+
+N_PLANILHAS = 5_000
+
+CABECALHOS = [
+    ['FASE', 'QUADRA', 'LOTE', 'VALOR A VISTA (01/2025)', 'SINAL'],
+    ['Etapa', 'Bloco', 'Unidade', 'Valor à Vista', 'Entrada'],
+    ['ETAPA', 'BLOCO', 'APTO', 'VALOR_A_VISTA', 'VALOR DE ENTRADA', 'OBS'],
+    ['Fase.', 'Quadra', 'Lote', 'Preço Tabela 10/2024', 'Entrada (Sinal)', 'Corretor'],
+    ['Lote', 'Unidade', 'Valor Total', 'Preço', 'Sinal', 'Entrada'],
+]
+
+def normalizar_antigo(name):
+    text = str(name)
+    text = re.sub(r'\(.*\)', '', text)
+    text = re.sub(r'\d{1,2}/\d{1,2}/\d{2,4}', '', text)
+    nfkd_form = unicodedata.normalize('NFD', text)
+    only_ascii = u"".join([c for c in nfkd_form if not unicodedata.combining(c)])
+    return only_ascii.replace('_', ' ').replace('.', '').strip().upper()
+
+def resolver_antigo(colunas, is_merge_file=False):
+    nomes_originais = {}
+    original_columns_map = {normalizar_antigo(col): col for col in colunas}
+    rename_map = {}
+    for standard_name, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in original_columns_map:
+                original_col_name = original_columns_map[alias]
+                rename_map[original_col_name] = standard_name
+                cleaned_original_name = re.sub(r'\(.*\)|(\d{1,2}/\d{1,2}/\d{2,4})', '', original_col_name).strip()
+                if not is_merge_file or standard_name in ['UNIDADE', 'ENTRADA']:
+                    nomes_originais[standard_name] = cleaned_original_name
+                break
+    return rename_map, nomes_originais
+
+def resolver_varias(resolver, planilhas):
+    return [resolver(colunas) for colunas in planilhas]
+
+def main():
+    rng = np.random.default_rng(42)
+    planilhas = [CABECALHOS[i] for i in rng.integers(0, len(CABECALHOS), N_PLANILHAS)]
+
+    for cabecalhos in CABECALHOS:
+        for is_merge_file in (False, True):
+            assert resolver_antigo(cabecalhos, is_merge_file) == resolver_colunas(cabecalhos, is_merge_file), cabecalhos
+            rename_map, nomes_originais = resolver_antigo(cabecalhos, is_merge_file)
+            df = process_dataframe(pd.DataFrame(columns=cabecalhos), is_merge_file)
+            assert list(df.columns) == [rename_map.get(col, col) for col in cabecalhos]
+            assert df.attrs['nomes_originais'] == nomes_originais
+
+    t_antigo = cronometrar(resolver_varias, resolver_antigo, planilhas)
+    t_novo = cronometrar(resolver_varias, resolver_colunas, planilhas)
+    print(f"{N_PLANILHAS} planilhas: antigo {t_antigo:.3f}s, índice {t_novo:.3f}s ({t_antigo / t_novo:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# Arquivo: backend/benchmarks/bench_cache.py
+# Latência do upload e do cálculo de uma planilha de 100 mil lotes sem cache,
+# com o cache em memória e só com o cache em disco, pelos endpoints (TestClient).
+# Confere que as respostas vindas do cache são idênticas às calculadas.
+# Uso (a partir de backend/): python -m benchmarks.bench_cache
+
+import tempfile
+
+from fastapi.testclient import TestClient
+
+import main as api
+from core.cache_resultados import CacheResultados
+from benchmarks._dados import gerar_csv_precos, cronometrar
+
+N_LOTES = 100_000
+CALCULO = {'prazo_anos': 30, 'taxa_juros_anual': 9.5}
+
+def enviar(cliente, conteudo):
+    resposta = cliente.post('/api/upload', files={'file': ('precos.csv', conteudo, 'text/csv')})
+    assert resposta.status_code == 200, resposta.text
+    return resposta
+
+def calcular(cliente, tabela_id):
+    resposta = cliente.post('/api/calcular', json={'tabela_id': tabela_id, **CALCULO})
+    assert resposta.status_code == 200, resposta.text
+    return resposta
+
+def medir(cliente, conteudo, esperado):
+    """Primeira chamada (preenche o cache) e a melhor das seguintes."""
+    t_upload = cronometrar(enviar, cliente, conteudo, repeticoes=1)
+    tabela_id = enviar(cliente, conteudo).headers['X-Tabela-Id']
+    t_calculo = cronometrar(calcular, cliente, tabela_id, repeticoes=1)
+    assert enviar(cliente, conteudo).content == esperado['upload']
+    assert calcular(cliente, tabela_id).content == esperado['calculo']
+    return t_upload, cronometrar(enviar, cliente, conteudo), t_calculo, cronometrar(calcular, cliente, tabela_id)
+
+def main():
+    conteudo = gerar_csv_precos(N_LOTES).encode('utf-8')
+    with TestClient(api.app) as cliente, tempfile.TemporaryDirectory() as diretorio:
+        api.cache = CacheResultados(memoria_max_mb=0)
+        resposta = enviar(cliente, conteudo)
+        esperado = {'upload': resposta.content, 'calculo': calcular(cliente, resposta.headers['X-Tabela-Id']).content}
+        t_upload, _, t_calculo, _ = medir(cliente, conteudo, esperado)
+
+        api.cache = CacheResultados(memoria_max_mb=1024)
+        _, t_upload_memoria, _, t_calculo_memoria = medir(cliente, conteudo, esperado)
+        assert api.cache.contadores['acertos_memoria'] > 0
+
+        # Memória zerada: tudo vai para o disco e é lido de lá a cada acerto
+        api.cache = CacheResultados(memoria_max_mb=0, diretorio=diretorio)
+        _, t_upload_disco, _, t_calculo_disco = medir(cliente, conteudo, esperado)
+        assert api.cache.contadores['acertos_disco'] > 0
+
+    print(f"{N_LOTES} lotes ({len(conteudo) / 1e6:.1f} MB de CSV):")
+    print(f"  upload:  sem cache {t_upload:.3f}s, memória {t_upload_memoria:.4f}s, disco {t_upload_disco:.3f}s")
+    print(f"  cálculo: sem cache {t_calculo:.3f}s, memória {t_calculo_memoria:.4f}s, disco {t_calculo_disco:.3f}s")
+
+if __name__ == '__main__':
+    main()
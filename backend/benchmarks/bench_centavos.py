@@ -0,0 +1,54 @@
+# Arquivo: backend/benchmarks/bench_centavos.py
+# Modo exato em centavos contra o cálculo em float64: velocidade de
+# calcular_mensais em 1 milhão de lotes x 40 anos, e quantas mensais de cada um
+# diferem da referência com Decimal (meio para o par e meio para cima).
+# Uso (a partir de backend/): python -m benchmarks.bench_centavos
+
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP
+
+from core.calculator import calcular_mensais, nomes_colunas_mensais
+from benchmarks._dados import gerar_lotes, cronometrar
+
+N_LOTES = 1_000_000
+N_REFERENCIA = 2_000
+PRAZO_ANOS = 40
+TAXA_JUROS_ANUAL = 9.5
+REGRAS_DECIMAL = {'half_even': ROUND_HALF_EVEN, 'half_up': ROUND_HALF_UP}
+
+def referencia_decimal(df_lotes, prazo_anos, taxa_juros_anual, regra):
+    """Mensais calculadas lote a lote com Decimal, arredondando cada ano como o contrato."""
+    fator = 1 + Decimal(str(taxa_juros_anual)) / 100
+    centavo = Decimal('0.01')
+    linhas = []
+    for valor, entrada in zip(df_lotes['VALOR_A_VISTA'], df_lotes['ENTRADA']):
+        mensal = ((Decimal(str(valor)) - Decimal(str(entrada))) / (prazo_anos * 12)).quantize(centavo, regra)
+        linha = [mensal]
+        for _ in range(1, prazo_anos):
+            mensal = (mensal * fator).quantize(centavo, regra)
+            linha.append(mensal)
+        linhas.append(linha)
+    return linhas
+
+def divergencias(df_calculado, referencia):
+    valores = df_calculado[nomes_colunas_mensais(PRAZO_ANOS)].to_numpy()
+    return sum(Decimal(str(float(valor))) != esperado for linha, linha_esperada in zip(valores, referencia) for valor, esperado in zip(linha, linha_esperada))
+
+def main():
+    df_amostra = gerar_lotes(N_REFERENCIA)
+    print(f"Mensais diferentes da referência Decimal ({N_REFERENCIA} lotes x {PRAZO_ANOS} anos):")
+    for arredondamento, regra in REGRAS_DECIMAL.items():
+        referencia = referencia_decimal(df_amostra, PRAZO_ANOS, TAXA_JUROS_ANUAL, regra)
+        exato = divergencias(calcular_mensais(df_amostra, PRAZO_ANOS, TAXA_JUROS_ANUAL, arredondamento), referencia)
+        flutuante = divergencias(calcular_mensais(df_amostra, PRAZO_ANOS, TAXA_JUROS_ANUAL), referencia)
+        assert exato == 0
+        print(f"  {arredondamento}: float64 {flutuante}, centavos {exato}")
+
+    df_lotes = gerar_lotes(N_LOTES)
+    t_float = cronometrar(calcular_mensais, df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL)
+    print(f"calcular_mensais em {N_LOTES} lotes x {PRAZO_ANOS} anos: float64 {t_float:.3f}s")
+    for arredondamento in REGRAS_DECIMAL:
+        t_exato = cronometrar(calcular_mensais, df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL, arredondamento)
+        print(f"  centavos ({arredondamento}) {t_exato:.3f}s ({t_exato / t_float:.2f}x)")
+
+if __name__ == '__main__':
+    main()
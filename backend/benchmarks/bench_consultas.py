@@ -0,0 +1,48 @@
+# Arquivo: backend/benchmarks/bench_consultas.py
+# Micro-benchmark das consultas: filtrar e enviar a tabela inteira (como o
+# cliente faz hoje) contra uma página ordenada pelo índice de categorias, e
+# groupby do pandas contra o resumo por códigos.
+# Uso (a partir de backend/): python -m benchmarks.bench_consultas
+
+from core.calculator import filtrar_lotes
+from core.consultas import IndiceCategorias, paginar, resumir_grupos
+from core.respostas import registros_json
+from benchmarks._dados import gerar_lotes, cronometrar
+
+N_LOTES = 200_000
+FILTROS = {'etapas': ['1', '2', '3'], 'blocos': [f'Q{bloco}' for bloco in range(1, 40)]}
+
+def tabela_inteira(df_lotes):
+    return registros_json(filtrar_lotes(df_lotes, **FILTROS).sort_values('VALOR_A_VISTA', kind='stable'))
+
+def pagina(df_lotes, indice):
+    df_pagina, _ = paginar(df_lotes, indice, FILTROS, 'VALOR_A_VISTA', pagina=3, tamanho_pagina=100)
+    return registros_json(df_pagina)
+
+def resumo_pandas(df_lotes):
+    return filtrar_lotes(df_lotes, **FILTROS).groupby(['ETAPA', 'BLOCO']).agg(
+        quantidade_lotes=('UNIDADE', 'size'), total_valor_a_vista=('VALOR_A_VISTA', 'sum')
+    )
+
+def main():
+    df_lotes = gerar_lotes(N_LOTES)
+    t_indice = cronometrar(IndiceCategorias, df_lotes)
+    indice = IndiceCategorias(df_lotes)
+
+    df_pagina, _ = paginar(df_lotes, indice, FILTROS, 'VALOR_A_VISTA', pagina=3, tamanho_pagina=100)
+    assert df_pagina.equals(filtrar_lotes(df_lotes, **FILTROS).sort_values('VALOR_A_VISTA', kind='stable').iloc[200:300])
+    esperado = resumo_pandas(df_lotes)
+    resumo = resumir_grupos(df_lotes, indice, filtros=FILTROS)
+    assert [linha['quantidade_lotes'] for linha in resumo] == esperado['quantidade_lotes'].tolist()
+    assert [linha['total_valor_a_vista'] for linha in resumo] == esperado['total_valor_a_vista'].round(2).tolist()
+
+    t_inteira = cronometrar(tabela_inteira, df_lotes)
+    t_pagina = cronometrar(pagina, df_lotes, indice)
+    t_groupby = cronometrar(resumo_pandas, df_lotes)
+    t_resumo = cronometrar(resumir_grupos, df_lotes, indice, filtros=FILTROS)
+    print(f"{N_LOTES} lotes (índice montado em {t_indice:.3f}s)")
+    print(f"  tabela filtrada inteira em JSON {t_inteira:.3f}s, página de 100 lotes {t_pagina:.4f}s")
+    print(f"  groupby do pandas {t_groupby:.3f}s, resumo pelo índice {t_resumo:.4f}s")
+
+if __name__ == '__main__':
+    main()
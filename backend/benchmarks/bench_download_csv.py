@@ -0,0 +1,48 @@
+# Arquivo: backend/benchmarks/bench_download_csv.py
+# Compara a exportação em memória (tabela inteira + BytesIO) com a exportação
+# em blocos de gerar_csv_mensais: pico de memória (tracemalloc) e tempo até o
+# primeiro bloco.
+# Uso (a partir de backend/): python -m benchmarks.bench_download_csv
+
+import time
+import tracemalloc
+from io import BytesIO
+
+from core.calculator import calcular_mensais, formatar_dataframe_para_csv, gerar_csv_mensais
+from benchmarks._dados import gerar_lotes
+
+N_LOTES = 50_000
+PRAZO_ANOS = 40
+TAXA_JUROS_ANUAL = 9.5
+
+def exportar_em_memoria(df_lotes):
+    stream = BytesIO()
+    formatar_dataframe_para_csv(calcular_mensais(df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL)).to_csv(stream, index=False, sep=';', encoding='utf-8-sig')
+    stream.seek(0)
+    for bloco in iter(lambda: stream.read(65536), b''):
+        yield bloco
+
+def exportar_em_blocos(df_lotes):
+    return gerar_csv_mensais(df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL)
+
+def medir(nome, exportar, df_lotes):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    primeiro_byte = None
+    total_bytes = 0
+    for bloco in exportar(df_lotes):
+        if primeiro_byte is None: primeiro_byte = time.perf_counter() - inicio
+        total_bytes += len(bloco)
+    duracao = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nome:<12} primeiro byte {primeiro_byte:7.3f}s  total {duracao:7.3f}s  pico {pico / 2**20:8.1f} MiB  ({total_bytes / 2**20:.1f} MiB de CSV)")
+
+def main():
+    df_lotes = gerar_lotes(N_LOTES)
+    print(f"{N_LOTES} lotes x {PRAZO_ANOS} anos")
+    medir('em memória', exportar_em_memoria, df_lotes)
+    medir('em blocos', exportar_em_blocos, df_lotes)
+
+if __name__ == '__main__':
+    main()
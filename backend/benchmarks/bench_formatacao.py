@@ -0,0 +1,35 @@
+# Arquivo: backend/benchmarks/bench_formatacao.py
+# Micro-benchmark da formatação de moeda: f-string célula a célula contra
+# formatar_moeda_brl_coluna, numa tabela de mensais de 40 anos.
+# Uso (a partir de backend/): python -m benchmarks.bench_formatacao
+
+import numpy as np
+
+from core.calculator import calcular_mensais
+from core.formatacao import formatar_moeda_brl, formatar_moeda_brl_coluna
+from benchmarks._dados import gerar_lotes, cronometrar
+
+N_LOTES = 20_000
+PRAZO_ANOS = 40
+
+def formatar_por_celula(df):
+    return {col: df[col].apply(lambda x: formatar_moeda_brl(x) if isinstance(x, (int, float)) else x) for col in df.columns}
+
+def formatar_por_coluna(df):
+    return {col: formatar_moeda_brl_coluna(df[col]) for col in df.columns}
+
+def main():
+    df_mensais = calcular_mensais(gerar_lotes(N_LOTES), PRAZO_ANOS, 9.5).filter(like='MENSAL')
+    # Casos de borda entram na comparação: negativos, -0.0, empates e NaN.
+    df_mensais.iloc[:8, 0] = [-1234.5, -0.0, -0.001, 0.125, 2.675, np.nan, np.inf, 1e15]
+
+    celula, coluna = formatar_por_celula(df_mensais), formatar_por_coluna(df_mensais)
+    assert all(celula[col].equals(coluna[col]) for col in df_mensais.columns)
+
+    t_celula = cronometrar(formatar_por_celula, df_mensais)
+    t_coluna = cronometrar(formatar_por_coluna, df_mensais)
+    n_celulas = df_mensais.size
+    print(f"{n_celulas} células: por célula {t_celula:.3f}s, por coluna {t_coluna:.3f}s ({t_celula / t_coluna:.1f}x)")
+
+if __name__ == '__main__':
+    main()
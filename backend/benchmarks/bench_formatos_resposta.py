@@ -0,0 +1,38 @@
+# Arquivo: backend/benchmarks/bench_formatos_resposta.py
+# Micro-benchmark dos formatos de resposta: tempo de serialização e tamanho do
+# corpo de uma tabela de mensais de 40 anos em cada formato.
+# Uso (a partir de backend/): python -m benchmarks.bench_formatos_resposta
+
+import json
+
+from core.calculator import calcular_mensais
+from core.respostas import SERIALIZADORES, orjson, pyarrow
+from benchmarks._dados import gerar_lotes, cronometrar
+
+N_LOTES = 20_000
+PRAZO_ANOS = 40
+
+def decodificar(formato, corpo):
+    """Volta o corpo para a lista de registros, para conferir com o formato padrão."""
+    if formato == 'registros':
+        return json.loads(corpo)
+    if formato == 'colunas':
+        colunas = json.loads(corpo)
+        return [dict(zip(colunas, valores)) for valores in zip(*colunas.values())]
+    if formato == 'ndjson':
+        return [json.loads(linha) for linha in corpo.splitlines()]
+    return pyarrow.ipc.open_stream(corpo).read_all().to_pylist()
+
+def main():
+    df_mensais = calcular_mensais(gerar_lotes(N_LOTES), PRAZO_ANOS, 9.5)
+    registros = df_mensais.to_dict(orient='records')
+    print(f"{len(df_mensais)} lotes x {df_mensais.shape[1]} colunas (orjson: {'sim' if orjson else 'não'})")
+    for formato, serializar in SERIALIZADORES.items():
+        if formato == 'arrow' and pyarrow is None: continue
+        corpo = serializar(df_mensais)
+        assert decodificar(formato, corpo) == registros, formato
+        tempo = cronometrar(serializar, df_mensais)
+        print(f"{formato:>10}: {tempo:.3f}s, {len(corpo) / 2**20:6.1f} MB")
+
+if __name__ == '__main__':
+    main()
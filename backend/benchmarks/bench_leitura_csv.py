@@ -0,0 +1,38 @@
+# Arquivo: backend/benchmarks/bench_leitura_csv.py
+# Mede a leitura de uma planilha de preços de 500 mil linhas: conversão de
+# moeda célula a célula (parse_moeda) contra parse_moeda_coluna, e os motores
+# de leitura 'c' e 'pyarrow'.
+# Uso (a partir de backend/): python -m benchmarks.bench_leitura_csv
+
+from io import StringIO
+
+import numpy as np
+
+from core import calculator
+from core.calculator import carregar_dados_csv, ler_csv, parse_moeda, parse_moeda_coluna
+from benchmarks._dados import gerar_csv_precos, cronometrar
+
+N_LINHAS = 500_000
+
+def main():
+    texto_csv = gerar_csv_precos(N_LINHAS)
+    df_texto = ler_csv(StringIO(texto_csv))
+    coluna = df_texto['VALOR A VISTA (01/2025)']
+
+    por_celula = coluna.apply(parse_moeda)
+    vetorizado = parse_moeda_coluna(coluna)
+    assert np.array_equal(por_celula.to_numpy(), vetorizado.to_numpy())
+
+    t_celula = cronometrar(coluna.apply, parse_moeda)
+    t_coluna = cronometrar(parse_moeda_coluna, coluna)
+    print(f"{N_LINHAS} valores: parse_moeda por célula {t_celula:.3f}s, parse_moeda_coluna {t_coluna:.3f}s ({t_celula / t_coluna:.1f}x)")
+
+    motores = ['c'] + (['pyarrow'] if calculator.pyarrow is not None else [])
+    for motor in motores:
+        calculator.CSV_ENGINE = motor
+        tempo = cronometrar(lambda: carregar_dados_csv(StringIO(texto_csv)))
+        print(f"carregar_dados_csv com motor '{motor}': {tempo:.3f}s")
+    calculator.CSV_ENGINE = 'c'
+
+if __name__ == '__main__':
+    main()
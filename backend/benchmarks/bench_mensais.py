@@ -0,0 +1,41 @@
+# Arquivo: backend/benchmarks/bench_mensais.py
+# Compara o cálculo de mensais coluna a coluna (implementação antiga) com a
+# matriz gerada por gerar_matriz_mensais.
+# Uso (a partir de backend/): python -m benchmarks.bench_mensais
+
+import numpy as np
+
+from core.calculator import calcular_mensais
+from benchmarks._dados import gerar_lotes, cronometrar
+
+PRAZO_ANOS = 40
+TAXA_JUROS_ANUAL = 9.5
+
+def calcular_mensais_por_coluna(df_lotes, prazo_anos, taxa_juros_anual):
+    df_resultado = df_lotes.copy()
+    total_meses = prazo_anos * 12
+    saldo_inicial = df_resultado['VALOR_A_VISTA'] - df_resultado['ENTRADA']
+    df_resultado['MENSAL ANO 01'] = (saldo_inicial / total_meses).round(2)
+    mensal_anterior = df_resultado['MENSAL ANO 01']
+    for ano in range(2, prazo_anos + 1):
+        mensal_atual = (mensal_anterior * (1 + taxa_juros_anual / 100)).round(2)
+        df_resultado[f'MENSAL ANO {ano:02d}'] = mensal_atual
+        mensal_anterior = mensal_atual
+    return df_resultado
+
+def main():
+    print(f"{'lotes':>10} {'por coluna (s)':>15} {'matriz (s)':>12} {'ganho':>7}")
+    for n_lotes in (10_000, 100_000, 1_000_000):
+        df_lotes = gerar_lotes(n_lotes)
+        antigo = calcular_mensais_por_coluna(df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL)
+        novo = calcular_mensais(df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL)
+        # O resultado precisa ser idêntico bit a bit, não apenas próximo.
+        assert list(antigo.columns) == list(novo.columns)
+        assert np.array_equal(antigo.to_numpy(), novo.to_numpy())
+
+        t_antigo = cronometrar(calcular_mensais_por_coluna, df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL)
+        t_novo = cronometrar(calcular_mensais, df_lotes, PRAZO_ANOS, TAXA_JUROS_ANUAL)
+        print(f"{n_lotes:>10} {t_antigo:>15.4f} {t_novo:>12.4f} {t_antigo / t_novo:>6.1f}x")
+
+if __name__ == '__main__':
+    main()
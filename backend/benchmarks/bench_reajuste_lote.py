@@ -0,0 +1,51 @@
+# Arquivo: backend/benchmarks/bench_reajuste_lote.py
+# Micro-benchmark do reajuste em lote: uma regra por vez (filtrar_lotes +
+# reajustar_valores + aplicar, como o cliente faz hoje) contra todas as regras
+# numa chamada a reajustar_em_lote, conferindo que os valores finais são iguais.
+# Uso (a partir de backend/): python -m benchmarks.bench_reajuste_lote
+
+import numpy as np
+
+from core.calculator import filtrar_lotes, reajustar_valores, reajustar_em_lote
+from benchmarks._dados import gerar_lotes, cronometrar
+
+N_LOTES = 200_000
+N_REGRAS = 20
+
+def montar_regras(rng):
+    regras = []
+    for _ in range(N_REGRAS):
+        regra = {
+            'coluna_alvo': str(rng.choice(['VALOR_A_VISTA', 'ENTRADA'])),
+            'operacao': str(rng.choice(['Aumentar', 'Diminuir'])),
+            'tipo_reajuste': str(rng.choice(['%', 'R$'])),
+            'valor_reajuste': float(rng.integers(1, 10)),
+        }
+        if rng.random() < 0.5: regra['etapas'] = [str(rng.integers(1, 6))]
+        else: regra['blocos'] = [f'Q{bloco}' for bloco in rng.integers(1, 60, 5)]
+        regras.append(regra)
+    return regras
+
+def uma_regra_por_vez(df_lotes, regras):
+    df = df_lotes.copy()
+    for regra in regras:
+        df_filtrado = filtrar_lotes(df, regra.get('etapas'), regra.get('blocos'))
+        df_preview = reajustar_valores(df_filtrado, regra['coluna_alvo'], regra['operacao'], regra['tipo_reajuste'], regra['valor_reajuste'])
+        df.loc[df_preview.index, regra['coluna_alvo']] = df_preview['NOVO_VALOR']
+    return df
+
+def main():
+    df_lotes = gerar_lotes(N_LOTES)
+    regras = montar_regras(np.random.default_rng(1))
+    # Em R$ o ajuste em lote é arredondado em centavos; com valores inteiros o resultado é o mesmo.
+    df_esperado = uma_regra_por_vez(df_lotes, regras)
+    df_preview, _ = reajustar_em_lote(df_lotes, regras)
+    for coluna in ('VALOR_A_VISTA', 'ENTRADA'):
+        assert np.array_equal(df_esperado.loc[df_preview.index, coluna], df_preview[f'{coluna}_NOVO'])
+
+    t_sequencial = cronometrar(uma_regra_por_vez, df_lotes, regras)
+    t_lote = cronometrar(reajustar_em_lote, df_lotes, regras)
+    print(f"{N_LOTES} lotes, {N_REGRAS} regras: uma por vez {t_sequencial:.3f}s, em lote {t_lote:.3f}s ({t_sequencial / t_lote:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Arquivo: backend/benchmarks/bench_recalculo.py
+# Micro-benchmark do recálculo incremental: cálculo completo contra o
+# incremental depois de um reajuste em poucos lotes e depois de uma troca de
+# taxa, medindo o que cada endpoint faz (cálculo + JSON da resposta). Confere
+# que o diff aplicado sobre o resultado anterior dá a tabela nova.
+# Uso (a partir de backend/): python -m benchmarks.bench_recalculo
+
+import numpy as np
+import pandas as pd
+
+from core.calculator import calcular_mensais
+from core.recalculo import calcular_incremental
+from main import calcular, calcular_diff
+from benchmarks._dados import gerar_lotes, cronometrar
+
+N_LOTES = 200_000
+PRAZO_ANOS = 40
+N_REAJUSTADOS = 500
+
+def aplicar_diff(df_anterior, diff):
+    """O que a grade do cliente faria: troca a tabela inteira ou só as células do diff."""
+    if diff['completo']:
+        return pd.DataFrame(diff['colunas'])
+    df = df_anterior.copy()
+    for coluna, valores in diff['colunas'].items():
+        df.iloc[diff['linhas'], df.columns.get_loc(coluna)] = valores
+    return df
+
+def conferir(df_lotes, df_cliente, estado, diff, prazo, taxa):
+    esperado = calcular_mensais(df_lotes, prazo, taxa)
+    df_cliente = aplicar_diff(df_cliente, diff)
+    assert df_cliente.equals(esperado)
+    assert np.array_equal(estado.matriz, esperado.filter(like='MENSAL').to_numpy())
+    return df_cliente
+
+def main():
+    df_lotes = gerar_lotes(N_LOTES)
+    estado, diff = calcular_incremental(df_lotes, None, PRAZO_ANOS, 9.5)
+    df_cliente = conferir(df_lotes, None, estado, diff, PRAZO_ANOS, 9.5)
+
+    df_reajustado = df_lotes.copy()
+    linhas = np.random.default_rng(0).choice(N_LOTES, N_REAJUSTADOS, replace=False)
+    df_reajustado.iloc[linhas, df_reajustado.columns.get_loc('VALOR_A_VISTA')] *= 1.05
+    estado_reajuste, diff = calcular_incremental(df_reajustado, estado, PRAZO_ANOS, 9.5, versao=diff['versao'])
+    assert len(diff['linhas']) == N_REAJUSTADOS
+    df_cliente = conferir(df_reajustado, df_cliente, estado_reajuste, diff, PRAZO_ANOS, 9.5)
+
+    estado_taxa, diff = calcular_incremental(df_reajustado, estado_reajuste, PRAZO_ANOS, 8.0, versao=diff['versao'])
+    assert 'MENSAL ANO 01' not in diff['colunas']
+    df_cliente = conferir(df_reajustado, df_cliente, estado_taxa, diff, PRAZO_ANOS, 8.0)
+
+    estado_prazo, diff = calcular_incremental(df_reajustado, estado_taxa, 30, 8.0, versao=diff['versao'])
+    conferir(df_reajustado, df_cliente, estado_prazo, diff, 30, 8.0)
+
+    # Cliente com uma versão antiga (outra requisição trocou o estado): recebe a tabela inteira
+    estado_antigo, diff = calcular_incremental(df_reajustado, estado_prazo, 30, 9.5, versao=estado.versao)
+    assert diff['completo']
+    conferir(df_reajustado, None, estado_antigo, diff, 30, 9.5)
+
+    t_completo = cronometrar(calcular, df_reajustado, PRAZO_ANOS, 9.5, 'registros')
+    t_reajuste = cronometrar(calcular_diff, df_reajustado, estado, PRAZO_ANOS, 9.5, versao=estado.versao)
+    t_taxa = cronometrar(calcular_diff, df_reajustado, estado_reajuste, PRAZO_ANOS, 8.0, versao=estado_reajuste.versao)
+    print(f"{N_LOTES} lotes x {PRAZO_ANOS} anos: completo {t_completo:.3f}s, "
+          f"{N_REAJUSTADOS} lotes reajustados {t_reajuste:.3f}s, só a taxa {t_taxa:.3f}s")
+
+if __name__ == '__main__':
+    main()
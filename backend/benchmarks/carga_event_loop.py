@@ -0,0 +1,93 @@
+# Arquivo: backend/benchmarks/carga_event_loop.py
+# Teste de carga: mede a latência de cálculos pequenos (/api/calcular com
+# poucos lotes) com o servidor ocioso e enquanto uploads grandes estão rodando,
+# com o trabalho pesado no event loop (modo 'inline'), no pool de threads e no
+# pool de processos. Sobe um uvicorn de um worker para cada modo.
+# Uso (a partir de backend/): python -m benchmarks.carga_event_loop
+
+import os
+import sys
+import time
+import socket
+import subprocess
+import threading
+
+import httpx
+import numpy as np
+
+from benchmarks._dados import gerar_lotes, gerar_csv_precos
+
+MODOS = ['inline', 'thread', 'processo']
+N_LOTES_UPLOAD = 200_000
+UPLOADS_SIMULTANEOS = 2
+DURACAO_SEGUNDOS = 15
+INTERVALO_PEQUENAS = 0.02
+
+def porta_livre():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def subir_servidor(modo, porta):
+    # Sem cache de resultados: os uploads repetem os mesmos bytes e virariam acertos do cache
+    env = {**os.environ, 'CALCULADORA_EXECUTOR': modo, 'CALCULADORA_CACHE_MB': '0'}
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(porta), '--log-level', 'warning'],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f'http://127.0.0.1:{porta}/')
+            return processo
+        except httpx.TransportError:
+            time.sleep(0.1)
+    processo.kill()
+    raise RuntimeError("O servidor não subiu.")
+
+def enviar_uploads(url, planilha, parar, contagem):
+    with httpx.Client(timeout=120) as cliente:
+        while not parar.is_set():
+            resposta = cliente.post(f'{url}/api/upload', files={'file': ('lotes.csv', planilha)})
+            contagem[resposta.status_code] = contagem.get(resposta.status_code, 0) + 1
+
+def medir_pequenas(url, payload, duracao):
+    latencias = []
+    with httpx.Client(timeout=120) as cliente:
+        fim = time.perf_counter() + duracao
+        while time.perf_counter() < fim:
+            inicio = time.perf_counter()
+            cliente.post(f'{url}/api/calcular', json=payload).raise_for_status()
+            latencias.append(time.perf_counter() - inicio)
+            time.sleep(INTERVALO_PEQUENAS)
+    return np.array(latencias) * 1000
+
+def resumo(latencias):
+    return f"p50 {np.percentile(latencias, 50):7.1f}ms  p99 {np.percentile(latencias, 99):7.1f}ms  ({len(latencias)} req.)"
+
+def main():
+    planilha = gerar_csv_precos(N_LOTES_UPLOAD).encode('utf-8')
+    lotes = gerar_lotes(20)
+    payload = {'lotes': lotes.to_dict(orient='records'), 'prazo_anos': 10, 'taxa_juros_anual': 9.5}
+    print(f"Upload de {len(planilha) / 2**20:.1f} MB ({N_LOTES_UPLOAD} lotes) x {UPLOADS_SIMULTANEOS} em paralelo")
+
+    for modo in MODOS:
+        porta = porta_livre()
+        servidor = subir_servidor(modo, porta)
+        url = f'http://127.0.0.1:{porta}'
+        try:
+            ocioso = medir_pequenas(url, payload, DURACAO_SEGUNDOS / 3)
+            parar, contagem = threading.Event(), {}
+            threads = [threading.Thread(target=enviar_uploads, args=(url, planilha, parar, contagem)) for _ in range(UPLOADS_SIMULTANEOS)]
+            for thread in threads: thread.start()
+            time.sleep(1)
+            com_uploads = medir_pequenas(url, payload, DURACAO_SEGUNDOS)
+            parar.set()
+            for thread in threads: thread.join()
+        finally:
+            servidor.terminate()
+            servidor.wait()
+        print(f"[{modo:>6}] ocioso:      {resumo(ocioso)}")
+        print(f"[{modo:>6}] com uploads: {resumo(com_uploads)}  uploads por status: {contagem}")
+
+if __name__ == '__main__':
+    main()
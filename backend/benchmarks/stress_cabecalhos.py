@@ -0,0 +1,54 @@
+# Arquivo: backend/benchmarks/stress_cabecalhos.py
+# Teste de estresse: dispara pares upload/download em paralelo contra a API,
+# cada um com cabeçalhos diferentes, e confere se todo CSV exportado traz os
+# cabeçalhos da sua própria planilha.
+# Uso (a partir de backend/): python -m benchmarks.stress_cabecalhos
+
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+N_PARES = 200
+N_THREADS = 16
+N_LOTES = 300
+
+ALIASES = {
+    'ETAPA': ['ETAPA', 'FASE'],
+    'BLOCO': ['BLOCO', 'QUADRA', 'QD'],
+    'UNIDADE': ['UNIDADE', 'LOTE', 'LT', 'NUMERO DO LOTE'],
+    'VALOR_A_VISTA': ['VALOR A VISTA', 'VALOR DO LOTE', 'PRECO'],
+    'ENTRADA': ['ENTRADA', 'SINAL', 'ATO'],
+}
+
+def montar_planilha(rng):
+    cabecalhos = [rng.choice(nomes) for nomes in ALIASES.values()]
+    linhas = [';'.join(cabecalhos)]
+    for unidade in range(N_LOTES):
+        linhas.append(f"{rng.randint(1, 3)};Q{rng.randint(1, 9)};{unidade};R$ {rng.randint(50, 500)}.000,00;R$ 1.000,00")
+    return cabecalhos, '\n'.join(linhas)
+
+def upload_e_download(semente):
+    rng = random.Random(semente)
+    cabecalhos, planilha = montar_planilha(rng)
+    with TestClient(app) as cliente:
+        upload = cliente.post('/api/upload', files={'file': ('lotes.csv', planilha.encode('utf-8'))})
+        upload.raise_for_status()
+        payload = {'tabela_id': upload.headers['X-Tabela-Id'], 'prazo_anos': rng.randint(1, 5), 'taxa_juros_anual': 9.5}
+        download = cliente.post('/api/download_csv', json=payload)
+        download.raise_for_status()
+    cabecalho_csv = download.content.decode('utf-8-sig').split('\n', 1)[0].split(';')
+    return cabecalho_csv[:len(cabecalhos)] == cabecalhos
+
+def main():
+    with ThreadPoolExecutor(max_workers=N_THREADS) as executor:
+        resultados = list(executor.map(upload_e_download, range(N_PARES)))
+    falhas = resultados.count(False)
+    print(f"{N_PARES} pares upload/download em {N_THREADS} threads: {falhas} exportações com cabeçalhos errados")
+    sys.exit(1 if falhas else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+# Arquivo: backend/benchmarks/suite.py
+# Suíte de benchmarks do pipeline da calculadora: leitura da planilha, merge de
+# entradas, reajuste, cálculo das mensais e formatação do CSV, direto nas
+# funções do core e pelos endpoints (TestClient, sem servidor). As planilhas são
+# sintéticas e geradas com semente fixa (cabeçalhos alternativos, moeda em
+# formatos misturados), então duas execuções na mesma máquina medem a mesma coisa.
+#
+# Os tempos (o menor entre as repetições; casos rápidos repetem mais) são gravados em JSON; a execução
+# seguinte compara com a baseline e marca como regressão o que ficou mais lento
+# que a tolerância. Sai com código 1 se houver regressão.
+#
+# Uso (a partir de backend/):
+#   python -m benchmarks.suite --salvar                     # mede e grava a baseline
+#   python -m benchmarks.suite                              # mede e compara com a baseline
+#   python -m benchmarks.suite --tamanhos 10000 --casos calcular_mensais,endpoint_calcular
+
+import gc
+import os
+import sys
+import json
+import platform
+import argparse
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main as api
+from core.cache_resultados import CacheResultados
+from core.calculator import carregar_dados_csv, merge_entradas_df, reajustar_valores, calcular_mensais, formatar_dataframe_para_csv
+from benchmarks._dados import gerar_csv_baguncado, gerar_csv_entradas, cronometrar
+
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), 'resultados')
+BASELINE_PADRAO = os.path.join(DIRETORIO_RESULTADOS, 'baseline.json')
+TAMANHOS_PADRAO = (10_000, 100_000, 1_000_000)
+# Acima disso os endpoints que devolvem a tabela calculada em JSON passam de 1 GB de resposta.
+MAX_LINHAS_ENDPOINTS = 100_000
+PRAZO_ANOS = 30
+TAXA_JUROS_ANUAL = 9.5
+# Diferenças menores que isso são ruído, qualquer que seja a proporção.
+RUIDO_SEGUNDOS = 0.005
+# Casos rápidos são repetidos até somar cerca deste tempo, para o mínimo ser estável.
+TEMPO_MINIMO_SEGUNDOS = 1.0
+MAX_REPETICOES = 50
+
+class Planilhas:
+    """Entradas de um tamanho, geradas uma vez e compartilhadas pelos casos."""
+
+    def __init__(self, n_lotes):
+        self.n_lotes = n_lotes
+        self.csv = gerar_csv_baguncado(n_lotes)
+        self.csv_entradas = gerar_csv_entradas(n_lotes)
+        self.df = carregar_dados_csv(StringIO(self.csv))
+        self.df_calculado = calcular_mensais(self.df, PRAZO_ANOS, TAXA_JUROS_ANUAL)
+        self.tabela_id = None
+
+def _post(cliente, rota, **kwargs):
+    resposta = cliente.post(rota, **kwargs)
+    assert resposta.status_code == 200, f"{rota}: {resposta.status_code} {resposta.text[:200]}"
+    return resposta
+
+def _enviar(cliente, planilhas):
+    return _post(cliente, '/api/upload', files={'file': ('precos.csv', planilhas.csv.encode('utf-8'), 'text/csv')})
+
+def _calculo(planilhas):
+    return {'tabela_id': planilhas.tabela_id, 'prazo_anos': PRAZO_ANOS, 'taxa_juros_anual': TAXA_JUROS_ANUAL}
+
+# Funções do core: (nome, função(planilhas))
+CASOS_CORE = [
+    ('carregar_dados_csv', lambda p: carregar_dados_csv(StringIO(p.csv))),
+    ('merge_entradas_df', lambda p: merge_entradas_df(p.df, StringIO(p.csv_entradas))),
+    ('reajustar_valores', lambda p: reajustar_valores(p.df, 'VALOR_A_VISTA', 'Aumentar', '%', 5)),
+    ('calcular_mensais', lambda p: calcular_mensais(p.df, PRAZO_ANOS, TAXA_JUROS_ANUAL)),
+    ('formatar_dataframe_para_csv', lambda p: formatar_dataframe_para_csv(p.df_calculado)),
+]
+
+# Endpoints: (nome, função(cliente, planilhas)). Nenhum altera a tabela guardada, exceto o merge, que fica por último.
+CASOS_ENDPOINTS = [
+    ('endpoint_upload', _enviar),
+    ('endpoint_reajustar', lambda c, p: _post(c, '/api/reajustar', json={
+        'tabela_id': p.tabela_id, 'coluna_alvo': 'VALOR_A_VISTA', 'operacao': 'Aumentar', 'tipo_reajuste': '%', 'valor_reajuste': 5})),
+    ('endpoint_calcular', lambda c, p: _post(c, '/api/calcular', json=_calculo(p))),
+    ('endpoint_download_csv', lambda c, p: _post(c, '/api/download_csv', json=_calculo(p))),
+    ('endpoint_merge_entradas', lambda c, p: _post(c, '/api/merge_entradas', data={'tabela_id': p.tabela_id},
+                                                   files={'file': ('entradas.csv', p.csv_entradas.encode('utf-8'), 'text/csv')})),
+]
+
+def medir_caso(funcao, *args, repeticoes=3):
+    """Menor tempo entre as repetições (ao menos `repeticoes`; mais se o caso for rápido)."""
+    gc.collect()
+    primeira = cronometrar(funcao, *args, repeticoes=1)
+    repeticoes = max(repeticoes, min(MAX_REPETICOES, int(TEMPO_MINIMO_SEGUNDOS / max(primeira, 1e-6))))
+    return min(primeira, cronometrar(funcao, *args, repeticoes=repeticoes - 1))
+
+def descrever_ambiente():
+    return {
+        'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+        'sistema': platform.platform(), 'processador': platform.processor() or platform.machine(), 'cpus': os.cpu_count(),
+        'executor': api.executor.modo,
+    }
+
+def medir(tamanhos, casos, repeticoes, max_linhas_endpoints):
+    resultados = {}
+    with TestClient(api.app) as cliente:
+        # Sem cache de resultados: cada repetição refaz o trabalho todo
+        api.cache = CacheResultados(memoria_max_mb=0)
+        for n_lotes in tamanhos:
+            planilhas = Planilhas(n_lotes)
+            for nome, funcao in CASOS_CORE:
+                if casos and nome not in casos: continue
+                resultados[f'{nome}@{n_lotes}'] = medir_caso(funcao, planilhas, repeticoes=repeticoes)
+                print(f"  {nome:<32} {n_lotes:>9} lotes {resultados[f'{nome}@{n_lotes}']:>9.4f}s", flush=True)
+            if n_lotes > max_linhas_endpoints: continue
+            planilhas.tabela_id = _enviar(cliente, planilhas).headers['X-Tabela-Id']
+            for nome, funcao in CASOS_ENDPOINTS:
+                if casos and nome not in casos: continue
+                resultados[f'{nome}@{n_lotes}'] = medir_caso(funcao, cliente, planilhas, repeticoes=repeticoes)
+                print(f"  {nome:<32} {n_lotes:>9} lotes {resultados[f'{nome}@{n_lotes}']:>9.4f}s", flush=True)
+    return resultados
+
+def comparar(atuais, baseline, tolerancia):
+    """Imprime a comparação com a baseline e retorna os casos que regrediram."""
+    regressoes = []
+    print(f"\n{'caso':<44} {'baseline':>10} {'atual':>10} {'razão':>7}")
+    for caso, tempo in atuais.items():
+        anterior = baseline['resultados'].get(caso)
+        if anterior is None:
+            print(f"{caso:<44} {'-':>10} {tempo:>10.4f}   (novo)")
+            continue
+        razao = tempo / anterior
+        marca = ''
+        if razao > 1 + tolerancia and tempo - anterior > RUIDO_SEGUNDOS:
+            marca = '  REGRESSÃO'
+            regressoes.append(caso)
+        elif razao < 1 - tolerancia and anterior - tempo > RUIDO_SEGUNDOS:
+            marca = '  melhora'
+        print(f"{caso:<44} {anterior:>10.4f} {tempo:>10.4f} {razao:>6.2f}x{marca}")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks do pipeline da calculadora.")
+    parser.add_argument('--tamanhos', default=','.join(map(str, TAMANHOS_PADRAO)), help="Quantidades de lotes, separadas por vírgula.")
+    parser.add_argument('--casos', default='', help="Só estes casos (nomes separados por vírgula).")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Repetições mínimas de cada caso.")
+    parser.add_argument('--max-linhas-endpoints', type=int, default=MAX_LINHAS_ENDPOINTS)
+    parser.add_argument('--baseline', default=BASELINE_PADRAO)
+    parser.add_argument('--tolerancia', type=float, default=0.25, help="Fração de aumento aceita antes de marcar regressão.")
+    parser.add_argument('--salvar', action='store_true', help="Grava os tempos medidos como a nova baseline.")
+    args = parser.parse_args()
+
+    tamanhos = [int(tamanho) for tamanho in args.tamanhos.split(',')]
+    casos = {caso for caso in args.casos.split(',') if caso}
+    print(f"Medindo {', '.join(map(str, tamanhos))} lotes (menor tempo de ao menos {args.repeticoes} repetições)")
+    execucao = {'ambiente': descrever_ambiente(), 'repeticoes': args.repeticoes, 'resultados': medir(tamanhos, casos, args.repeticoes, args.max_linhas_endpoints)}
+
+    os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+    with open(os.path.join(DIRETORIO_RESULTADOS, 'ultima.json'), 'w', encoding='utf-8') as arquivo:
+        json.dump(execucao, arquivo, indent=2, ensure_ascii=False)
+
+    if args.salvar:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        if os.path.exists(args.baseline):
+            # Casos que não foram medidos agora continuam com o tempo anterior
+            with open(args.baseline, encoding='utf-8') as arquivo:
+                execucao['resultados'] = {**json.load(arquivo)['resultados'], **execucao['resultados']}
+        with open(args.baseline, 'w', encoding='utf-8') as arquivo:
+            json.dump(execucao, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nBaseline gravada em {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nSem baseline em {args.baseline}; rode com --salvar para criar uma.")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as arquivo:
+        baseline = json.load(arquivo)
+    if baseline['ambiente'] != execucao['ambiente']:
+        print("\nAtenção: a baseline foi medida em outro ambiente; as diferenças podem não ser do código.")
+        for chave, valor in execucao['ambiente'].items():
+            if baseline['ambiente'].get(chave) != valor: print(f"  {chave}: {baseline['ambiente'].get(chave)} -> {valor}")
+    regressoes = comparar(execucao['resultados'], baseline, args.tolerancia)
+    if regressoes:
+        print(f"\n{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}: {', '.join(regressoes)}")
+        return 1
+    print("\nNenhuma regressão.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+# Arquivo: backend/core/amortizacao.py
+# Tabela de amortização mês a mês (Price ou SAC) de cada lote: parcela, juros,
+# amortização e saldo devedor. Com 480 meses x 100 mil lotes são 48 milhões de
+# linhas, então a tabela nunca é montada inteira: os lotes são calculados em
+# blocos e cada bloco sai como DataFrames pequenos, já serializados em CSV ou
+# NDJSON para o download em streaming.
+#
+# O saldo inicial é o mesmo de calcular_mensais (VALOR_A_VISTA - ENTRADA), com
+# prazo_anos * 12 parcelas e a taxa mensal equivalente à anual:
+# (1 + taxa/100) ** (1/12) - 1. Os valores são acompanhados em centavos
+# inteiros (guardados em float64, exatos até 2**53), arredondando os juros de
+# cada mês; a última parcela absorve o resto, então o saldo termina em zero.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.formatacao import formatar_moeda_brl_coluna
+from core.respostas import registros_ndjson
+from core.centavos import para_centavos, validar_arredondamento
+from core.metricas import etapa, contar
+
+SISTEMAS = ('price', 'sac')
+COLUNAS_LOTE = ['ETAPA', 'BLOCO', 'UNIDADE']
+COLUNAS_VALORES = ['PARCELA', 'JUROS', 'AMORTIZACAO', 'SALDO_DEVEDOR']
+COLUNAS_AMORTIZACAO = COLUNAS_LOTE + ['MES'] + COLUNAS_VALORES
+# Linhas de cada DataFrame entregue (e de cada parte do CSV/NDJSON).
+LINHAS_POR_BLOCO_AMORTIZACAO = int(os.getenv('CALCULADORA_LINHAS_POR_BLOCO_AMORTIZACAO', '20000'))
+# Linhas calculadas de uma vez (lotes x meses); limita a memória das quatro matrizes do bloco.
+LINHAS_POR_CALCULO = 500_000
+
+def validar_sistema(sistema):
+    if sistema not in SISTEMAS:
+        raise ValueError(f"Sistema de amortização inválido: '{sistema}'. Use {' ou '.join(SISTEMAS)}.")
+    return sistema
+
+def taxa_mensal_equivalente(taxa_juros_anual):
+    return (1 + taxa_juros_anual / 100) ** (1 / 12) - 1
+
+def _arredondar(centavos, arredondamento):
+    """Arredonda frações de centavo; sem regra, meio para o par (como o np.round do modo float)."""
+    if arredondamento == 'half_up':
+        return np.trunc(centavos + np.copysign(0.5, centavos))
+    return np.rint(centavos)
+
+def calcular_amortizacao(saldo_centavos, total_meses, taxa_mensal, sistema, arredondamento=None):
+    """Matrizes (lotes x meses) em centavos: parcela, juros, amortização e saldo após o pagamento."""
+    saldo = np.array(saldo_centavos, dtype=np.float64)
+    forma = (saldo.shape[0], total_meses)
+    parcelas, juros, amortizacoes, saldos = (np.empty(forma, dtype=np.float64) for _ in range(4))
+
+    if sistema == 'price':
+        if taxa_mensal == 0:
+            fixa = _arredondar(saldo / total_meses, arredondamento)
+        else:
+            fixa = _arredondar(saldo * (taxa_mensal / (1 - (1 + taxa_mensal) ** -total_meses)), arredondamento)
+    else:
+        fixa = _arredondar(saldo / total_meses, arredondamento)
+
+    for mes in range(total_meses):
+        juros_mes = _arredondar(saldo * taxa_mensal, arredondamento)
+        if mes == total_meses - 1:
+            amortizacao = saldo.copy()
+        else:
+            amortizacao = fixa - juros_mes if sistema == 'price' else fixa.copy()
+            # Com a parcela arredondada, o saldo pequeno acaba antes do prazo; não amortiza além dele.
+            excedente = np.abs(amortizacao) > np.abs(saldo)
+            amortizacao[excedente] = saldo[excedente]
+        saldo -= amortizacao
+        juros[:, mes] = juros_mes
+        amortizacoes[:, mes] = amortizacao
+        parcelas[:, mes] = juros_mes + amortizacao
+        saldos[:, mes] = saldo
+    return parcelas, juros, amortizacoes, saldos
+
+def gerar_amortizacao(df_lotes, prazo_anos, taxa_juros_anual, sistema, linhas_por_bloco=LINHAS_POR_BLOCO_AMORTIZACAO, arredondamento=None):
+    """Retorna um gerador de DataFrames com as colunas de COLUNAS_AMORTIZACAO (valores em reais).
+
+    As linhas seguem a ordem dos lotes e, em cada lote, os meses 1..N. Os
+    parâmetros (e os valores ausentes) são verificados aqui, antes do primeiro bloco.
+    """
+    validar_sistema(sistema)
+    validar_arredondamento(arredondamento)
+    total_meses = prazo_anos * 12
+    if total_meses <= 0: raise ValueError("O prazo em anos deve ser maior que zero.")
+    saldo_centavos = para_centavos(df_lotes['VALOR_A_VISTA']) - para_centavos(df_lotes['ENTRADA'])
+    taxa_mensal = taxa_mensal_equivalente(taxa_juros_anual)
+    lotes_por_calculo = max(1, LINHAS_POR_CALCULO // total_meses)
+    colunas_lote = {coluna: df_lotes[coluna].to_numpy() if coluna in df_lotes.columns else np.full(len(df_lotes), None, dtype=object)
+                    for coluna in COLUNAS_LOTE}
+    meses = np.arange(1, total_meses + 1, dtype=np.int64)
+
+    def blocos():
+        for inicio in range(0, len(df_lotes), lotes_por_calculo):
+            fim = min(inicio + lotes_por_calculo, len(df_lotes))
+            with etapa('calculo_amortizacao'):
+                matrizes = calcular_amortizacao(saldo_centavos[inicio:fim], total_meses, taxa_mensal, sistema, arredondamento)
+                # Centavos -> reais; ravel da matriz (lotes x meses) já deixa os meses de cada lote juntos
+                valores = [(matriz / 100).ravel() for matriz in matrizes]
+                repetidos = {coluna: np.repeat(valores_lote[inicio:fim], total_meses) for coluna, valores_lote in colunas_lote.items()}
+                coluna_meses = np.tile(meses, fim - inicio)
+            contar('calculo_amortizacao', linhas=len(coluna_meses))
+            for parte in range(0, len(coluna_meses), linhas_por_bloco):
+                recorte = slice(parte, parte + linhas_por_bloco)
+                dados = {coluna: repetidos[coluna][recorte] for coluna in COLUNAS_LOTE}
+                dados['MES'] = coluna_meses[recorte]
+                dados.update({coluna: valores_coluna[recorte] for coluna, valores_coluna in zip(COLUNAS_VALORES, valores)})
+                yield pd.DataFrame(dados, copy=False)
+    return blocos()
+
+def formatar_amortizacao_csv(df_bloco, nomes_originais):
+    """Cabeçalhos de ETAPA/BLOCO/UNIDADE como na planilha de origem e valores em R$."""
+    df_export = df_bloco.rename(columns={coluna: nomes_originais[coluna] for coluna in COLUNAS_LOTE if coluna in nomes_originais})
+    for coluna in COLUNAS_VALORES:
+        df_export[coluna] = formatar_moeda_brl_coluna(df_export[coluna])
+    return df_export
+
+def gerar_csv_amortizacao(df_lotes, prazo_anos, taxa_juros_anual, sistema, nomes_originais, linhas_por_bloco=LINHAS_POR_BLOCO_AMORTIZACAO, arredondamento=None):
+    """Gerador com o CSV (bytes, ';' e BOM, como o das mensais) da tabela de amortização."""
+    dataframes = gerar_amortizacao(df_lotes, prazo_anos, taxa_juros_anual, sistema, linhas_por_bloco, arredondamento)
+    # to_csv também no cabeçalho, para nomes originais com ';' ou aspas saírem entre aspas como nas linhas
+    cabecalho = '\ufeff' + pd.DataFrame(columns=[nomes_originais.get(coluna, coluna) for coluna in COLUNAS_AMORTIZACAO]).to_csv(index=False, sep=';')
+
+    def blocos():
+        yield cabecalho.encode('utf-8')
+        for df_bloco in dataframes:
+            with etapa('formatacao_csv'):
+                parte = formatar_amortizacao_csv(df_bloco, nomes_originais).to_csv(index=False, header=False, sep=';').encode('utf-8')
+            contar('formatacao_csv', tamanho_bytes=len(parte))
+            yield parte
+    return blocos()
+
+def gerar_ndjson_amortizacao(df_lotes, prazo_anos, taxa_juros_anual, sistema, linhas_por_bloco=LINHAS_POR_BLOCO_AMORTIZACAO, arredondamento=None):
+    """Gerador com a tabela de amortização em NDJSON (um registro por mês de cada lote)."""
+    dataframes = gerar_amortizacao(df_lotes, prazo_anos, taxa_juros_anual, sistema, linhas_por_bloco, arredondamento)
+
+    def blocos():
+        for df_bloco in dataframes:
+            with etapa('serializacao'):
+                parte = registros_ndjson(df_bloco)
+            contar('serializacao', tamanho_bytes=len(parte))
+            yield parte
+    return blocos()
@@ -0,0 +1,171 @@
+# Arquivo: backend/core/cache_resultados.py
+# Cache de resultados por hash do conteúdo: a mesma planilha enviada de novo,
+# ou o mesmo cálculo sobre a mesma tabela, não é processado outra vez.
+# Fica em memória (LRU limitado em bytes) e, opcionalmente, transborda para
+# um diretório local.
+
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from core.sessoes import tamanho_dataframe
+
+MEMORIA_PADRAO_MB = int(os.getenv('CALCULADORA_CACHE_MB', '256'))
+# Sem diretório configurado, o que sai da memória é descartado.
+DIRETORIO_PADRAO = os.getenv('CALCULADORA_CACHE_DIRETORIO') or None
+DISCO_PADRAO_MB = int(os.getenv('CALCULADORA_CACHE_DISCO_MB', '2048'))
+
+def hash_bytes(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()
+
+def hash_dataframe(df):
+    """Hash do conteúdo da tabela: nomes e tipos das colunas, attrs, índice e valores."""
+    resumo = hashlib.sha256()
+    resumo.update(repr([(str(coluna), str(tipo)) for coluna, tipo in df.dtypes.items()]).encode('utf-8'))
+    resumo.update(repr(sorted(df.attrs.items())).encode('utf-8'))
+    resumo.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return resumo.hexdigest()
+
+def montar_chave(*partes):
+    return hashlib.sha256('|'.join(map(repr, partes)).encode('utf-8')).hexdigest()
+
+def hash_arquivos(*caminhos):
+    """Hash do conteúdo dos arquivos (como o código-fonte dos módulos), para a versão do código entrar nas chaves."""
+    resumo = hashlib.sha256()
+    for caminho in caminhos:
+        with open(caminho, 'rb') as arquivo:
+            resumo.update(arquivo.read())
+    return resumo.hexdigest()
+
+def tamanho_valor(valor):
+    if isinstance(valor, (bytes, bytearray)): return len(valor)
+    if isinstance(valor, pd.DataFrame): return tamanho_dataframe(valor)
+    if isinstance(valor, (tuple, list)): return sum(tamanho_valor(item) for item in valor)
+    return 64
+
+class CacheResultados:
+    """LRU limitado em bytes, com transbordo opcional para disco e contadores de acertos.
+
+    Os valores guardados não devem ser alterados por quem os lê (como as tabelas
+    de TabelasEmMemoria, são compartilhados entre requisições).
+    """
+
+    def __init__(self, memoria_max_mb=MEMORIA_PADRAO_MB, diretorio=DIRETORIO_PADRAO, disco_max_mb=DISCO_PADRAO_MB, versao=None):
+        # Entra em todas as chaves: o que outra configuração ou versão do código gravou no disco não é reaproveitado
+        self.versao = versao
+        self.memoria_max_bytes = memoria_max_mb * 1024 * 1024
+        self.disco_max_bytes = disco_max_mb * 1024 * 1024
+        self.diretorio = diretorio
+        if diretorio: os.makedirs(diretorio, exist_ok=True)
+        self._memoria = OrderedDict()
+        self._disco = OrderedDict()
+        self._bytes_memoria = 0
+        self._bytes_disco = 0
+        self._lock = threading.Lock()
+        self.contadores = {'acertos_memoria': 0, 'acertos_disco': 0, 'faltas': 0, 'remocoes_memoria': 0, 'remocoes_disco': 0}
+        if diretorio: self._indexar_disco()
+
+    def _indexar_disco(self):
+        """As chaves são hashes do conteúdo e da `versao`, então o que ficou no disco de execuções anteriores
+        só é lido com a mesma configuração e código; o resto sai pelo LRU como qualquer entrada antiga."""
+        arquivos = [entrada for entrada in os.scandir(self.diretorio) if entrada.is_file() and entrada.name.endswith('.pkl')]
+        for entrada in sorted(arquivos, key=lambda entrada: entrada.stat().st_mtime):
+            tamanho = entrada.stat().st_size
+            self._disco[entrada.name[:-len('.pkl')]] = tamanho
+            self._bytes_disco += tamanho
+        while self._bytes_disco > self.disco_max_bytes and self._disco:
+            self._remover_do_disco(next(iter(self._disco)))
+
+    def _arquivo(self, chave):
+        return os.path.join(self.diretorio, f'{chave}.pkl')
+
+    def _chave(self, chave):
+        return montar_chave(self.versao, chave) if self.versao else chave
+
+    def obter(self, chave):
+        """Retorna o valor guardado ou None."""
+        chave = self._chave(chave)
+        with self._lock:
+            if chave in self._memoria:
+                self._memoria.move_to_end(chave)
+                self.contadores['acertos_memoria'] += 1
+                return self._memoria[chave][0]
+            no_disco = chave in self._disco
+            if not no_disco:
+                self.contadores['faltas'] += 1
+                return None
+        try:
+            with open(self._arquivo(chave), 'rb') as arquivo:
+                valor = pickle.load(arquivo)
+        except Exception:
+            # Arquivo apagado, corrompido ou gravado por outra versão das bibliotecas
+            with self._lock:
+                self._remover_do_disco(chave)
+                self.contadores['faltas'] += 1
+            return None
+        with self._lock:
+            self.contadores['acertos_disco'] += 1
+        # Volta para a memória; o arquivo continua valendo até ser removido.
+        self._guardar(chave, valor)
+        return valor
+
+    def guardar(self, chave, valor):
+        self._guardar(self._chave(chave), valor)
+
+    def _guardar(self, chave, valor):
+        tamanho = tamanho_valor(valor)
+        if tamanho > self.memoria_max_bytes:
+            # Maior que a memória toda: vai direto para o disco, se houver
+            if self.diretorio and chave not in self._disco: self._gravar_no_disco(chave, valor)
+            return
+        with self._lock:
+            anterior = self._memoria.pop(chave, None)
+            if anterior is not None: self._bytes_memoria -= anterior[1]
+            self._memoria[chave] = (valor, tamanho)
+            self._bytes_memoria += tamanho
+            despejados = []
+            while self._bytes_memoria > self.memoria_max_bytes:
+                chave_antiga, (valor_antigo, tamanho_antigo) = self._memoria.popitem(last=False)
+                self._bytes_memoria -= tamanho_antigo
+                self.contadores['remocoes_memoria'] += 1
+                if self.diretorio and chave_antiga not in self._disco: despejados.append((chave_antiga, valor_antigo))
+        for chave_antiga, valor_antigo in despejados:
+            self._gravar_no_disco(chave_antiga, valor_antigo)
+
+    def _gravar_no_disco(self, chave, valor):
+        caminho = self._arquivo(chave)
+        try:
+            with open(caminho + '.tmp', 'wb') as arquivo:
+                pickle.dump(valor, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(caminho + '.tmp', caminho)
+            tamanho = os.path.getsize(caminho)
+        except OSError:
+            return
+        with self._lock:
+            self._disco[chave] = tamanho
+            self._bytes_disco += tamanho
+            while self._bytes_disco > self.disco_max_bytes and self._disco:
+                self._remover_do_disco(next(iter(self._disco)))
+                self.contadores['remocoes_disco'] += 1
+
+    def _remover_do_disco(self, chave):
+        tamanho = self._disco.pop(chave, None)
+        if tamanho is None: return
+        self._bytes_disco -= tamanho
+        try:
+            os.remove(self._arquivo(chave))
+        except OSError:
+            pass
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                **self.contadores,
+                'entradas_memoria': len(self._memoria), 'bytes_memoria': self._bytes_memoria, 'limite_bytes_memoria': self.memoria_max_bytes,
+                'entradas_disco': len(self._disco), 'bytes_disco': self._bytes_disco,
+                'limite_bytes_disco': self.disco_max_bytes if self.diretorio else 0,
+            }
@@ -1,10 +1,32 @@
 # Arquivo: backend/core/calculator.py (VERSÃO FINAL COM TODAS AS FUNÇÕES)
 
+import os
+import json
+import numpy as np
 import pandas as pd
 from io import StringIO
+from functools import lru_cache
 import unicodedata
 import re
 
+from core.formatacao import formatar_moeda_brl_coluna
+from core.indice_unidades import IndiceUnidades
+from core.consultas import IndiceCategorias
+from core.metricas import etapa, contar
+from core.respostas import registros_ndjson
+from core.centavos import para_centavos, para_reais, multiplicar, centavos_de, fracao_decimal, gerar_matriz_centavos, validar_arredondamento
+
+try:
+    import pyarrow
+    import pyarrow.compute as pc
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pyarrow = None
+
+# 'c' (padrão) ou 'pyarrow'. O motor pyarrow só é usado se o pacote estiver instalado.
+CSV_ENGINE = os.getenv('CALCULADORA_CSV_ENGINE', 'c')
+LINHAS_POR_BLOCO_CSV = int(os.getenv('CALCULADORA_LINHAS_POR_BLOCO_CSV', '20000'))
+
 COLUMN_ALIASES = {
     'ETAPA': ['ETAPA', 'FASE'],
     'BLOCO': ['BLOCO', 'QUADRA', 'QD'],
@@ -19,49 +41,188 @@ COLUMN_ALIASES = {
     ]
 }
 
-found_column_names = {}
+# Arquivo JSON (ou YAML) opcional com aliases extras, no mesmo formato de COLUMN_ALIASES:
+# {"UNIDADE": ["UNID", "N LOTE"], "ENTRADA": ["ENTRADA 10%"]}
+ALIASES_ARQUIVO = os.getenv('CALCULADORA_ALIASES_ARQUIVO')
+
+_PARENTESES = re.compile(r'\(.*\)')
+_DATA = re.compile(r'\d{1,2}/\d{1,2}/\d{2,4}')
+_PARENTESES_OU_DATA = re.compile(r'\(.*\)|(\d{1,2}/\d{1,2}/\d{2,4})')
+
+COLUNAS_PADRAO = ['ETAPA', 'BLOCO', 'UNIDADE', 'VALOR_A_VISTA', 'ENTRADA']
+# Sem cabeçalhos de origem (ex.: lotes enviados em JSON), o CSV usa os nomes padrão.
+NOMES_PADRAO = {coluna: coluna for coluna in COLUNAS_PADRAO}
+
+def completar_nomes_originais(nomes_originais):
+    """Mapa parcial (como o enviado pelo cliente) sobre os nomes padrão; colunas ausentes ficam com o próprio nome."""
+    return {**NOMES_PADRAO, **(nomes_originais or {})}
+
+def nomes_originais_de(df):
+    """Mapa nome padrão -> cabeçalho original que acompanha a tabela em df.attrs."""
+    return completar_nomes_originais(df.attrs.get('nomes_originais'))
 
 def parse_moeda(valor_str):
     if isinstance(valor_str, (int, float)): return float(valor_str)
     try: return float(str(valor_str).replace('R$', '').strip().replace('.', '').replace(',', '.'))
     except (ValueError, TypeError): return 0.0
 
+# Número decimal simples, já sem 'R$', pontos de milhar e com vírgula trocada por ponto.
+_NUMERO_SIMPLES = r'^[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)$'
+
+def _parse_moeda_textos_arrow(textos):
+    """Converte strings com pyarrow.compute. Retorna (valores, validos)."""
+    texto = pyarrow.array(textos, type=pyarrow.string())
+    texto = pc.utf8_trim(pc.replace_substring(texto, 'R$', ''), ' \t')
+    texto = pc.utf8_trim(pc.replace_substring(pc.replace_substring(texto, '.', ''), ',', '.'), ' \t')
+    validos = pc.match_substring_regex(texto, _NUMERO_SIMPLES)
+    valores = pc.cast(pc.if_else(validos, texto, '0'), pyarrow.float64())
+    return valores.to_numpy(zero_copy_only=False), validos.to_numpy(zero_copy_only=False)
+
+def _parse_moeda_textos_python(textos):
+    """Mesmo contrato de _parse_moeda_textos_arrow, numa única passada em Python."""
+    limpos = np.array([texto.replace('R$', '').strip().replace('.', '').replace(',', '.') for texto in textos], dtype=object)
+    try:
+        return limpos.astype(np.float64), np.ones(len(limpos), dtype=bool)
+    except ValueError:
+        return np.zeros(len(limpos), dtype=np.float64), np.zeros(len(limpos), dtype=bool)
+
+def parse_moeda_coluna(serie):
+    """Versão vetorizada de parse_moeda: mesmo resultado, aplicada à coluna inteira."""
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return serie.astype(np.float64)
+    valores = serie.to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(valores, skipna=True) != 'string':
+        return serie.apply(parse_moeda).astype(np.float64)
+
+    converter = _parse_moeda_textos_arrow if pyarrow is not None else _parse_moeda_textos_python
+    resultado = np.empty(len(valores), dtype=np.float64)
+    pendentes = pd.isna(valores)
+    indices_texto = np.flatnonzero(~pendentes)
+    convertidos, validos = converter(valores[indices_texto])
+    resultado[indices_texto] = convertidos
+    pendentes[indices_texto[~validos]] = True
+    # Vazios e formatos fora do padrão (ex.: '1e3', lixo) seguem o caminho original.
+    for indice in np.flatnonzero(pendentes):
+        resultado[indice] = parse_moeda(valores[indice])
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+@lru_cache(maxsize=4096)
 def normalize_column_name(name):
     text = str(name)
-    text = re.sub(r'\(.*\)', '', text)
-    text = re.sub(r'\d{1,2}/\d{1,2}/\d{2,4}', '', text)
+    text = _PARENTESES.sub('', text)
+    text = _DATA.sub('', text)
     nfkd_form = unicodedata.normalize('NFD', text)
     only_ascii = u"".join([c for c in nfkd_form if not unicodedata.combining(c)])
     return only_ascii.replace('_', ' ').replace('.', '').strip().upper()
 
+def carregar_aliases_arquivo(caminho):
+    """Lê aliases extras de um arquivo JSON ou YAML ({nome padrão: [aliases]})."""
+    with open(caminho, encoding='utf-8') as arquivo:
+        if caminho.endswith(('.yml', '.yaml')):
+            import yaml
+            aliases = yaml.safe_load(arquivo) or {}
+        else:
+            aliases = json.load(arquivo)
+    desconhecidas = set(aliases) - set(COLUMN_ALIASES)
+    if desconhecidas:
+        raise ValueError(f"Colunas desconhecidas no arquivo de aliases '{caminho}': {sorted(desconhecidas)}.")
+    return aliases
+
+def montar_indice_aliases(*grupos_aliases):
+    """Monta o índice alias normalizado -> (nome padrão, prioridade).
+
+    A prioridade segue a ordem dos aliases (e dos grupos): quando a planilha tem
+    mais de uma coluna candidata, vence a de menor prioridade, como na busca
+    linear original.
+    """
+    indice = {}
+    prioridade = 0
+    for aliases in grupos_aliases:
+        for standard_name, nomes in aliases.items():
+            for alias in nomes:
+                chave = normalize_column_name(alias)
+                anterior = indice.get(chave)
+                if anterior is not None and anterior[0] != standard_name:
+                    raise ValueError(f"O alias '{alias}' aparece em '{anterior[0]}' e em '{standard_name}'.")
+                if anterior is None:
+                    indice[chave] = (standard_name, prioridade)
+                prioridade += 1
+    return indice
+
+ALIAS_INDEX = montar_indice_aliases(COLUMN_ALIASES, *([carregar_aliases_arquivo(ALIASES_ARQUIVO)] if ALIASES_ARQUIVO else []))
+
 # --- FUNÇÃO QUE ESTAVA FALTANDO ---
-def process_dataframe(df, is_merge_file=False):
-    """Função centralizada para renomear e preparar um DataFrame."""
-    global found_column_names
-    if not is_merge_file:
-        found_column_names.clear()
+def resolver_colunas(colunas, is_merge_file=False):
+    """Mapeia cabeçalhos da planilha para os nomes padrão.
 
-    original_columns_map = {normalize_column_name(col): col for col in df.columns}
+    Retorna (rename_map, nomes_originais), com os nomes originais já sem datas e parênteses.
+    """
+    original_columns_map = {normalize_column_name(col): col for col in colunas}
+    encontradas = {}
+    for normalized_name, original_col_name in original_columns_map.items():
+        standard_name, prioridade = ALIAS_INDEX.get(normalized_name, (None, None))
+        if standard_name is not None and (standard_name not in encontradas or prioridade < encontradas[standard_name][0]):
+            encontradas[standard_name] = (prioridade, original_col_name)
+
+    nomes_originais = {}
     rename_map = {}
-    
-    for standard_name, aliases in COLUMN_ALIASES.items():
-        for alias in aliases:
-            if alias in original_columns_map:
-                original_col_name = original_columns_map[alias]
-                rename_map[original_col_name] = standard_name
-                
-                cleaned_original_name = re.sub(r'\(.*\)|(\d{1,2}/\d{1,2}/\d{2,4})', '', original_col_name).strip()
-                
-                if not is_merge_file or standard_name in ['UNIDADE', 'ENTRADA']:
-                    found_column_names[standard_name] = cleaned_original_name
-                break
+    for standard_name in COLUMN_ALIASES:
+        if standard_name not in encontradas: continue
+        original_col_name = encontradas[standard_name][1]
+        rename_map[original_col_name] = standard_name
+        
+        cleaned_original_name = _PARENTESES_OU_DATA.sub('', original_col_name).strip()
+        
+        if not is_merge_file or standard_name in ['UNIDADE', 'ENTRADA']:
+            nomes_originais[standard_name] = cleaned_original_name
+    return rename_map, nomes_originais
+
+def process_dataframe(df, is_merge_file=False):
+    """Função centralizada para renomear e preparar um DataFrame.
+
+    Os cabeçalhos originais encontrados ficam em df.attrs['nomes_originais'].
+    """
+    rename_map, nomes_originais = resolver_colunas(df.columns, is_merge_file)
     df.rename(columns=rename_map, inplace=True)
+    df.attrs['nomes_originais'] = nomes_originais
     return df
 # --- FIM DA FUNÇÃO QUE FALTAVA ---
 
+# Mesmos textos que o pandas trata como vazio por padrão.
+_VALORES_NULOS_CSV = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+def _ler_csv_pyarrow(file_stream):
+    conteudo = file_stream.read()
+    if isinstance(conteudo, str): conteudo = conteudo.encode('utf-8')
+    opcoes_leitura = pa_csv.ParseOptions(delimiter=';')
+    # O pyarrow não tem "tudo como texto": lemos o cabeçalho e tipamos cada coluna.
+    cabecalho = pa_csv.read_csv(pyarrow.py_buffer(conteudo.split(b'\n', 1)[0] + b'\n'), parse_options=opcoes_leitura).column_names
+    opcoes_conversao = pa_csv.ConvertOptions(
+        column_types={nome: pyarrow.string() for nome in cabecalho},
+        null_values=_VALORES_NULOS_CSV, strings_can_be_null=True
+    )
+    tabela = pa_csv.read_csv(pyarrow.py_buffer(conteudo), parse_options=opcoes_leitura, convert_options=opcoes_conversao)
+    df = tabela.to_pandas()
+    return df.mask(df.isna())
+
+def ler_csv(file_stream):
+    """Lê o CSV com todas as colunas como texto; vazios ficam como NaN."""
+    if CSV_ENGINE == 'pyarrow' and pyarrow is not None:
+        df = _ler_csv_pyarrow(file_stream)
+    else:
+        df = pd.read_csv(file_stream, sep=';', skip_blank_lines=True, dtype=str)
+    return df.dropna(how='all')
+
 def carregar_dados_csv(file_stream: StringIO, is_merge_file=False):
-    df = pd.read_csv(file_stream, sep=';', skip_blank_lines=True, dtype=str).dropna(how='all')
-    df = process_dataframe(df, is_merge_file=is_merge_file)
+    with etapa('leitura_csv'):
+        df = ler_csv(file_stream)
+    contar('leitura_csv', linhas=len(df))
+    with etapa('cabecalhos'):
+        df = process_dataframe(df, is_merge_file=is_merge_file)
+    nomes_originais = df.attrs['nomes_originais']
 
     if not is_merge_file:
         colunas_obrigatorias = ['BLOCO', 'UNIDADE', 'VALOR_A_VISTA']
@@ -69,74 +230,338 @@ def carregar_dados_csv(file_stream: StringIO, is_merge_file=False):
             if col not in df.columns:
                 raise ValueError(f"Coluna obrigatória não encontrada: '{col}'.")
         
-        if 'ETAPA' not in df.columns: found_column_names['ETAPA'] = 'ETAPA'
+        if 'ETAPA' not in df.columns: nomes_originais['ETAPA'] = 'ETAPA'
         
-        if 'ENTRADA' not in df.columns:
-            df['ENTRADA'] = 0.0
-            found_column_names['ENTRADA'] = 'ENTRADA'
-        else:
-            df['ENTRADA'] = df['ENTRADA'].fillna('0').apply(parse_moeda)
-        
-        df['VALOR_A_VISTA'] = df['VALOR_A_VISTA'].apply(parse_moeda)
+        with etapa('parse_moeda'):
+            if 'ENTRADA' not in df.columns:
+                df['ENTRADA'] = 0.0
+                nomes_originais['ENTRADA'] = 'ENTRADA'
+            else:
+                df['ENTRADA'] = parse_moeda_coluna(df['ENTRADA'].fillna('0'))
+            
+            df['VALOR_A_VISTA'] = parse_moeda_coluna(df['VALOR_A_VISTA'])
     
-    final_columns = [col for col in ['ETAPA', 'BLOCO', 'UNIDADE', 'VALOR_A_VISTA', 'ENTRADA'] if col in df.columns]
-    return df[final_columns]
+    final_columns = [col for col in COLUNAS_PADRAO if col in df.columns]
+    df_final = df[final_columns]
+    df_final.attrs['nomes_originais'] = nomes_originais
+    return df_final
 
-def merge_entradas_df(df_principal, df_entradas_stream):
-    df_entradas = pd.read_csv(df_entradas_stream, sep=';', skip_blank_lines=True, dtype=str).dropna(how='all')
-    df_entradas = process_dataframe(df_entradas, is_merge_file=True)
+def merge_entradas_df(df_principal, df_entradas_stream, indice=None, usar_bloco=False):
+    """Combina a planilha de entradas com a tabela principal.
+
+    `indice` permite reaproveitar um IndiceUnidades já montado para a tabela
+    principal. Retorna o DataFrame combinado e o relatório do merge.
+    """
+    with etapa('leitura_csv'):
+        df_entradas = ler_csv(df_entradas_stream)
+    contar('leitura_csv', linhas=len(df_entradas))
+    with etapa('cabecalhos'):
+        df_entradas = process_dataframe(df_entradas, is_merge_file=True)
 
     if 'UNIDADE' not in df_entradas.columns or 'ENTRADA' not in df_entradas.columns:
         raise ValueError("A planilha de entradas precisa conter colunas para 'UNIDADE' e 'ENTRADA'.")
     
-    df_entradas_essencial = df_entradas[['UNIDADE', 'ENTRADA']].copy()
-    df_entradas_essencial['ENTRADA'] = df_entradas_essencial['ENTRADA'].fillna('0').apply(parse_moeda)
-    
-    if 'ENTRADA' in df_principal.columns:
-        df_principal = df_principal.drop(columns=['ENTRADA'])
+    colunas_entradas = ['BLOCO', 'UNIDADE', 'ENTRADA'] if usar_bloco and 'BLOCO' in df_entradas.columns else ['UNIDADE', 'ENTRADA']
+    df_entradas_essencial = df_entradas[colunas_entradas].copy()
+    with etapa('parse_moeda'):
+        df_entradas_essencial['ENTRADA'] = parse_moeda_coluna(df_entradas_essencial['ENTRADA'].fillna('0'))
 
-    df_merged = pd.merge(df_principal, df_entradas_essencial, on='UNIDADE', how='left')
-    df_merged['ENTRADA'] = df_merged['ENTRADA'].fillna(0)
+    if indice is None or indice.usar_bloco != usar_bloco:
+        with etapa('indice_unidades'):
+            indice = IndiceUnidades(df_principal, usar_bloco=usar_bloco)
+    with etapa('combinacao'):
+        df_merged, relatorio = indice.combinar(df_principal, df_entradas_essencial)
+    contar('combinacao', linhas=len(df_principal))
     
-    final_columns = [col for col in ['ETAPA', 'BLOCO', 'UNIDADE', 'VALOR_A_VISTA', 'ENTRADA'] if col in df_merged.columns]
-    return df_merged[final_columns]
+    final_columns = [col for col in COLUNAS_PADRAO if col in df_merged.columns]
+    df_final = df_merged[final_columns]
+    # Os cabeçalhos de UNIDADE e ENTRADA passam a ser os da planilha de entradas.
+    df_final.attrs['nomes_originais'] = {**nomes_originais_de(df_principal), **df_entradas.attrs['nomes_originais']}
+    return df_final, relatorio
 
-def calcular_mensais(df_lotes, prazo_anos, taxa_juros_anual):
-    df_resultado = df_lotes.copy()
+def filtrar_lotes(df_lotes, etapas=None, blocos=None, unidades=None):
+    mascara = np.ones(len(df_lotes), dtype=bool)
+    for coluna, valores in (('ETAPA', etapas), ('BLOCO', blocos), ('UNIDADE', unidades)):
+        if valores and coluna in df_lotes.columns:
+            mascara &= df_lotes[coluna].astype(str).isin(valores).to_numpy()
+    return df_lotes if mascara.all() else df_lotes[mascara]
+
+def nomes_colunas_mensais(prazo_anos):
+    return [f'MENSAL ANO {ano:02d}' for ano in range(1, prazo_anos + 1)]
+
+def gerar_matriz_mensais(saldo_inicial, prazo_anos, taxa_juros_anual):
+    """Gera a matriz (lotes x anos) de mensais a partir do saldo de cada lote.
+
+    O arredondamento de cada ano é feito sobre o valor já arredondado do ano
+    anterior, exatamente como no cálculo coluna a coluna do pandas.
+    """
     total_meses = prazo_anos * 12
     if total_meses <= 0: raise ValueError("O prazo em anos deve ser maior que zero.")
-    saldo_inicial = df_resultado['VALOR_A_VISTA'] - df_resultado['ENTRADA']
-    df_resultado['MENSAL ANO 01'] = (saldo_inicial / total_meses).round(2)
-    mensal_anterior = df_resultado['MENSAL ANO 01']
-    for ano in range(2, prazo_anos + 1):
-        mensal_atual = (mensal_anterior * (1 + taxa_juros_anual / 100)).round(2)
-        df_resultado[f'MENSAL ANO {ano:02d}'] = mensal_atual
-        mensal_anterior = mensal_atual
+    saldo = np.asarray(saldo_inicial, dtype=np.float64)
+    fator = 1 + taxa_juros_anual / 100
+    # Layout em Fortran: cada ano é uma coluna contígua na memória.
+    matriz = np.empty((saldo.shape[0], prazo_anos), dtype=np.float64, order='F')
+    np.round(saldo / total_meses, 2, out=matriz[:, 0])
+    for ano in range(1, prazo_anos):
+        np.multiply(matriz[:, ano - 1], fator, out=matriz[:, ano])
+        np.round(matriz[:, ano], 2, out=matriz[:, ano])
+    return matriz
+
+def matriz_mensais(valores, entradas, prazo_anos, taxa_juros_anual, arredondamento=None):
+    """Matriz (lotes x anos) de mensais em reais.
+
+    Com `arredondamento` ('half_even' ou 'half_up'), o cálculo é exato, em
+    centavos inteiros (ver core/centavos.py); sem ele, em float64 com round(2).
+    """
+    if validar_arredondamento(arredondamento):
+        matriz = gerar_matriz_centavos(para_centavos(valores) - para_centavos(entradas), prazo_anos, taxa_juros_anual, arredondamento, dtype=np.float64)
+        matriz /= 100
+        return matriz
+    return gerar_matriz_mensais(np.asarray(valores, dtype=np.float64) - np.asarray(entradas, dtype=np.float64), prazo_anos, taxa_juros_anual)
+
+def calcular_mensais(df_lotes, prazo_anos, taxa_juros_anual, arredondamento=None):
+    """Tabela de lotes com as colunas MENSAL ANO 01..NN (ver matriz_mensais para o `arredondamento`)."""
+    valores = df_lotes['VALOR_A_VISTA'].to_numpy(dtype=np.float64)
+    entradas = df_lotes['ENTRADA'].to_numpy(dtype=np.float64)
+    matriz = matriz_mensais(valores, entradas, prazo_anos, taxa_juros_anual, arredondamento)
+    df_mensais = pd.DataFrame(matriz, index=df_lotes.index, columns=nomes_colunas_mensais(prazo_anos), copy=False)
+    df_resultado = pd.concat([df_lotes, df_mensais], axis=1, copy=False)
+    df_resultado.attrs = dict(df_lotes.attrs)
     return df_resultado
 
-def reajustar_valores(df_lotes, coluna_alvo, operacao, tipo_reajuste, valor_reajuste):
+def calcular_cenarios(df_lotes, cenarios, incluir_tabelas=False, arredondamento=None):
+    """Calcula vários pares (prazo_anos, taxa_juros_anual) sobre o mesmo saldo.
+
+    Todos os cenários avançam juntos, ano a ano, numa matriz (lotes x cenários);
+    os valores de cada cenário são idênticos aos de calcular_mensais. No modo
+    exato (`arredondamento`), cada cenário é calculado em centavos, um por vez.
+    """
+    if not cenarios: raise ValueError("Informe ao menos um cenário.")
+    prazos = np.array([prazo for prazo, _ in cenarios], dtype=np.int64)
+    taxas = np.array([taxa for _, taxa in cenarios], dtype=np.float64)
+    if (prazos <= 0).any(): raise ValueError("O prazo em anos deve ser maior que zero.")
+    fatores = 1 + taxas / 100
+
+    n_lotes, n_cenarios = len(df_lotes), len(cenarios)
+    matrizes = [np.empty((n_lotes, prazo), dtype=np.float64, order='F') for prazo in prazos] if incluir_tabelas else None
+
+    if validar_arredondamento(arredondamento):
+        saldo_centavos = para_centavos(df_lotes['VALOR_A_VISTA']) - para_centavos(df_lotes['ENTRADA'])
+        mensal_ano_01 = np.empty((n_lotes, n_cenarios), dtype=np.float64)
+        mensal_final = np.empty((n_lotes, n_cenarios), dtype=np.float64)
+        soma_mensais = np.empty(n_cenarios, dtype=np.float64)
+        for indice, (prazo, taxa) in enumerate(cenarios):
+            matriz = gerar_matriz_centavos(saldo_centavos, int(prazo), taxa, arredondamento, dtype=np.float64)
+            # Soma dos centavos inteiros, exata antes da divisão
+            soma_mensais[indice] = matriz.sum() / 100
+            matriz /= 100
+            mensal_ano_01[:, indice] = matriz[:, 0]
+            mensal_final[:, indice] = matriz[:, -1]
+            if incluir_tabelas: matrizes[indice] = matriz
+    else:
+        saldo_inicial = df_lotes['VALOR_A_VISTA'].to_numpy(dtype=np.float64) - df_lotes['ENTRADA'].to_numpy(dtype=np.float64)
+        mensal = np.round(saldo_inicial[:, None] / (prazos * 12)[None, :], 2)
+        mensal_ano_01 = mensal.copy()
+        mensal_final = mensal.copy()
+        soma_mensais = np.zeros(n_cenarios, dtype=np.float64)
+        for ano in range(int(prazos.max())):
+            if ano > 0:
+                np.multiply(mensal, fatores, out=mensal)
+                np.round(mensal, 2, out=mensal)
+            ativos = np.flatnonzero(prazos > ano)
+            soma_mensais[ativos] += mensal[:, ativos].sum(axis=0)
+            finais = np.flatnonzero(prazos == ano + 1)
+            mensal_final[:, finais] = mensal[:, finais]
+            if incluir_tabelas:
+                for indice in ativos: matrizes[indice][:, ano] = mensal[:, indice]
+
+    resultados = []
+    for indice, (prazo, taxa) in enumerate(cenarios):
+        resumo = {
+            'prazo_anos': int(prazo),
+            'taxa_juros_anual': float(taxa),
+            'quantidade_lotes': int(n_lotes),
+            'total_mensal_ano_01': round(float(mensal_ano_01[:, indice].sum()), 2),
+            'media_mensal_ano_01': round(float(mensal_ano_01[:, indice].mean()), 2) if n_lotes else 0.0,
+            'media_mensal_ultimo_ano': round(float(mensal_final[:, indice].mean()), 2) if n_lotes else 0.0,
+            'total_parcelas': round(float(soma_mensais[indice] * 12), 2),
+        }
+        if incluir_tabelas:
+            df_mensais = pd.DataFrame(matrizes[indice], index=df_lotes.index, columns=nomes_colunas_mensais(int(prazo)), copy=False)
+            resumo['tabela'] = pd.concat([df_lotes, df_mensais], axis=1, copy=False)
+            resumo['tabela'].attrs = dict(df_lotes.attrs)
+        resultados.append(resumo)
+    return resultados
+
+def reajustar_valores(df_lotes, coluna_alvo, operacao, tipo_reajuste, valor_reajuste, arredondamento=None):
     df_preview = df_lotes[['UNIDADE', coluna_alvo]].copy()
     df_preview.rename(columns={coluna_alvo: 'VALOR_ATUAL'}, inplace=True)
     fator = 1 if operacao == "Aumentar" else -1
-    if tipo_reajuste == "%": ajuste = (df_preview['VALOR_ATUAL'] * (valor_reajuste / 100) * fator).round(2)
-    else: ajuste = valor_reajuste * fator
-    df_preview['AJUSTE'] = ajuste
-    df_preview['NOVO_VALOR'] = df_preview['VALOR_ATUAL'] + df_preview['AJUSTE']
+    if validar_arredondamento(arredondamento):
+        # Modo exato: a soma também é feita em centavos, para o novo valor não herdar erro do float
+        atual = para_centavos(df_preview['VALOR_ATUAL'])
+        ajuste = _ajuste_centavos(atual, fator, tipo_reajuste, valor_reajuste, arredondamento)
+        df_preview['VALOR_ATUAL'] = para_reais(atual)
+        df_preview['AJUSTE'] = para_reais(ajuste)
+        df_preview['NOVO_VALOR'] = para_reais(atual + ajuste)
+    else:
+        if tipo_reajuste == "%": ajuste = (df_preview['VALOR_ATUAL'] * (valor_reajuste / 100) * fator).round(2)
+        else: ajuste = valor_reajuste * fator
+        df_preview['AJUSTE'] = ajuste
+        df_preview['NOVO_VALOR'] = df_preview['VALOR_ATUAL'] + df_preview['AJUSTE']
     df_preview[coluna_alvo] = df_preview['NOVO_VALOR']
     return df_preview
 
-def formatar_dataframe_para_csv(df):
+def _ajuste_centavos(centavos, fator, tipo_reajuste, valor_reajuste, arredondamento):
+    if tipo_reajuste == '%': return multiplicar(centavos, fracao_decimal(valor_reajuste) / 100 * fator, arredondamento)
+    return np.full(len(centavos), centavos_de(valor_reajuste, arredondamento) * fator, dtype=np.int64)
+
+OPERACOES_REAJUSTE = {'Aumentar': 1, 'Diminuir': -1}
+TIPOS_REAJUSTE = ('%', 'R$')
+COLUNAS_REAJUSTAVEIS = ('VALOR_A_VISTA', 'ENTRADA')
+
+def _mascara_regra(df_lotes, indice, valores_atuais, regra, escala=1):
+    """Lotes que a regra alcança. `escala` converte os limites de valor para a unidade de `valores_atuais`."""
+    mascara = indice.mascara(ETAPA=regra.get('etapas'), BLOCO=regra.get('blocos')) if indice else np.ones(len(df_lotes), dtype=bool)
+    if regra.get('unidades'):
+        mascara &= df_lotes['UNIDADE'].astype(str).isin(regra['unidades']).to_numpy()
+    if regra.get('valor_minimo') is not None or regra.get('valor_maximo') is not None:
+        coluna_valor = regra.get('coluna_valor') or 'VALOR_A_VISTA'
+        valores = valores_atuais[coluna_valor] if coluna_valor in valores_atuais else df_lotes[coluna_valor].to_numpy(dtype=np.float64) * escala
+        with np.errstate(invalid='ignore'):
+            if regra.get('valor_minimo') is not None: mascara &= valores >= regra['valor_minimo'] * escala
+            if regra.get('valor_maximo') is not None: mascara &= valores <= regra['valor_maximo'] * escala
+    return mascara
+
+def reajustar_em_lote(df_lotes, regras, arredondamento=None):
+    """Aplica uma lista ordenada de regras de reajuste, cada uma com seus filtros.
+
+    Cada regra é um dicionário com coluna_alvo, operacao, tipo_reajuste e
+    valor_reajuste (como em reajustar_valores) e filtros opcionais: etapas, blocos,
+    unidades e valor_minimo/valor_maximo (inclusivos) sobre coluna_valor
+    (VALOR_A_VISTA por padrão). As regras valem em sequência, como chamadas
+    seguidas: os filtros por valor enxergam o resultado das regras anteriores.
+    O ajuste de cada regra é arredondado em centavos antes de ser somado; com
+    `arredondamento`, tudo é feito em centavos inteiros, como em reajustar_valores.
+
+    Retorna (df_preview, resumo_regras). O preview tem só os lotes alterados, com
+    <COLUNA>_ATUAL, <COLUNA>_AJUSTE e <COLUNA>_NOVO para cada coluna reajustada e
+    REGRAS com os números das regras aplicadas ao lote.
+    """
+    if not regras: raise ValueError("Informe ao menos uma regra de reajuste.")
+    for numero, regra in enumerate(regras, 1):
+        if regra['coluna_alvo'] not in COLUNAS_REAJUSTAVEIS:
+            raise ValueError(f"Regra {numero}: só é possível reajustar {', '.join(COLUNAS_REAJUSTAVEIS)}.")
+        if regra['operacao'] not in OPERACOES_REAJUSTE or regra['tipo_reajuste'] not in TIPOS_REAJUSTE:
+            raise ValueError(f"Regra {numero}: operação ou tipo de reajuste inválido.")
+
+    validar_arredondamento(arredondamento)
+    n_lotes = len(df_lotes)
+    escala = 100 if arredondamento else 1
+    indice = IndiceCategorias(df_lotes) if any(regra.get('etapas') or regra.get('blocos') for regra in regras) else None
+    atuais, novos, ajustes = {}, {}, {}
+    aplicadas = np.zeros((len(regras), n_lotes), dtype=bool)
+    resumo = []
+    for numero, regra in enumerate(regras, 1):
+        coluna = regra['coluna_alvo']
+        if coluna not in novos:
+            atuais[coluna] = para_centavos(df_lotes[coluna]) if arredondamento else df_lotes[coluna].to_numpy(dtype=np.float64, copy=True)
+            novos[coluna] = atuais[coluna].copy()
+            ajustes[coluna] = np.zeros_like(atuais[coluna])
+        mascara = _mascara_regra(df_lotes, indice, novos, regra, escala)
+        valores = novos[coluna][mascara]
+        fator = OPERACOES_REAJUSTE[regra['operacao']]
+        if arredondamento: ajuste = _ajuste_centavos(valores, fator, regra['tipo_reajuste'], regra['valor_reajuste'], arredondamento)
+        elif regra['tipo_reajuste'] == '%': ajuste = np.round(valores * (regra['valor_reajuste'] / 100) * fator, 2)
+        else: ajuste = np.full(len(valores), round(regra['valor_reajuste'] * fator, 2))
+        novos[coluna][mascara] = valores + ajuste
+        ajustes[coluna][mascara] += ajuste
+        aplicadas[numero - 1] = mascara
+        resumo.append({
+            'regra': numero,
+            'coluna_alvo': coluna,
+            'lotes_afetados': int(mascara.sum()),
+            'total_antes': round(float(np.nansum(valores)) / escala, 2),
+            'total_depois': round(float(np.nansum(valores + ajuste)) / escala, 2),
+            'variacao_total': round(float(np.nansum(ajuste)) / escala, 2),
+        })
+
+    afetados = aplicadas.any(axis=0)
+    df_preview = df_lotes.loc[afetados, ['UNIDADE']].copy()
+    for coluna in novos:
+        if arredondamento:
+            df_preview[f'{coluna}_ATUAL'] = para_reais(atuais[coluna][afetados])
+            df_preview[f'{coluna}_AJUSTE'] = para_reais(ajustes[coluna][afetados])
+            df_preview[f'{coluna}_NOVO'] = para_reais(novos[coluna][afetados])
+            continue
+        df_preview[f'{coluna}_ATUAL'] = atuais[coluna][afetados]
+        df_preview[f'{coluna}_AJUSTE'] = np.round(ajustes[coluna][afetados], 2)
+        df_preview[f'{coluna}_NOVO'] = novos[coluna][afetados]
+    # Poucas combinações de regras se repetem em muitos lotes: o texto é montado uma vez por combinação.
+    bits = np.ascontiguousarray(np.packbits(aplicadas[:, afetados], axis=0).T)
+    combinacoes, inverso = np.unique(bits.view(f'V{bits.shape[1]}').ravel(), return_inverse=True)
+    textos = np.array([
+        ','.join(str(numero + 1) for numero in np.flatnonzero(np.unpackbits(np.frombuffer(combinacao.tobytes(), dtype=np.uint8))[:len(regras)]))
+        for combinacao in combinacoes
+    ], dtype=object)
+    df_preview['REGRAS'] = textos[inverso.ravel()]
+    return df_preview, resumo
+
+def formatar_dataframe_para_csv(df, nomes_originais=None):
+    """Volta os cabeçalhos para os nomes originais da planilha e formata as colunas de moeda.
+
+    Sem `nomes_originais`, usa o mapa guardado em df.attrs pelo carregamento do CSV.
+    """
+    nomes_originais = completar_nomes_originais(nomes_originais) if nomes_originais else nomes_originais_de(df)
     df_export = df.copy()
-    reverse_rename_map = {std_name: orig_name for std_name, orig_name in found_column_names.items() if std_name in df_export.columns}
+    reverse_rename_map = {std_name: orig_name for std_name, orig_name in nomes_originais.items() if std_name in df_export.columns}
     df_export.rename(columns=reverse_rename_map, inplace=True)
     
     colunas_moeda_nomes_originais = []
-    if 'VALOR_A_VISTA' in found_column_names: colunas_moeda_nomes_originais.append(found_column_names['VALOR_A_VISTA'])
-    if 'ENTRADA' in found_column_names: colunas_moeda_nomes_originais.append(found_column_names['ENTRADA'])
+    if 'VALOR_A_VISTA' in nomes_originais: colunas_moeda_nomes_originais.append(nomes_originais['VALOR_A_VISTA'])
+    if 'ENTRADA' in nomes_originais: colunas_moeda_nomes_originais.append(nomes_originais['ENTRADA'])
     colunas_moeda_nomes_originais.extend([col for col in df_export.columns if 'MENSAL' in col])
 
     for col in colunas_moeda_nomes_originais:
         if col in df_export.columns:
-            df_export[col] = df_export[col].apply(lambda x: f'R$ {x:,.2f}'.replace(",", "X").replace(".", ",").replace("X", ".") if isinstance(x, (int, float)) else x)
+            df_export[col] = formatar_moeda_brl_coluna(df_export[col])
             
-    return df_export
\ No newline at end of file
+    return df_export
+
+def gerar_csv_mensais(df_lotes, prazo_anos, taxa_juros_anual, nomes_originais=None, linhas_por_bloco=LINHAS_POR_BLOCO_CSV, arredondamento=None):
+    """Retorna um gerador com o CSV final (bytes) produzido em blocos de linhas.
+
+    Cada bloco é calculado, formatado e serializado isoladamente, então a memória
+    usada não depende do total de lotes. Os parâmetros são validados aqui, antes
+    do primeiro byte, para que o erro ainda possa virar uma resposta HTTP.
+    """
+    nomes_originais = nomes_originais or nomes_originais_de(df_lotes)
+    df_cabecalho = formatar_dataframe_para_csv(calcular_mensais(df_lotes.iloc[:0], prazo_anos, taxa_juros_anual, arredondamento), nomes_originais)
+    cabecalho = '\ufeff' + df_cabecalho.to_csv(index=False, sep=';')
+
+    def blocos():
+        yield cabecalho.encode('utf-8')
+        for inicio in range(0, len(df_lotes), linhas_por_bloco):
+            with etapa('calculo_mensais'):
+                df_bloco = calcular_mensais(df_lotes.iloc[inicio:inicio + linhas_por_bloco], prazo_anos, taxa_juros_anual, arredondamento)
+            contar('calculo_mensais', linhas=len(df_bloco))
+            with etapa('formatacao_csv'):
+                parte = formatar_dataframe_para_csv(df_bloco, nomes_originais).to_csv(index=False, header=False, sep=';').encode('utf-8')
+            contar('formatacao_csv', tamanho_bytes=len(parte))
+            yield parte
+    return blocos()
+
+def gerar_ndjson_mensais(df_lotes, prazo_anos, taxa_juros_anual, linhas_por_bloco=LINHAS_POR_BLOCO_CSV, arredondamento=None):
+    """Como gerar_csv_mensais, em NDJSON (um registro por lote, valores numéricos)."""
+    calcular_mensais(df_lotes.iloc[:0], prazo_anos, taxa_juros_anual, arredondamento)
+
+    def blocos():
+        for inicio in range(0, len(df_lotes), linhas_por_bloco):
+            with etapa('calculo_mensais'):
+                df_bloco = calcular_mensais(df_lotes.iloc[inicio:inicio + linhas_por_bloco], prazo_anos, taxa_juros_anual, arredondamento)
+            contar('calculo_mensais', linhas=len(df_bloco))
+            with etapa('serializacao'):
+                parte = registros_ndjson(df_bloco)
+            contar('serializacao', tamanho_bytes=len(parte))
+            yield parte
+    return blocos()
@@ -0,0 +1,111 @@
+# Arquivo: backend/core/centavos.py
+# Modo exato para valores em dinheiro: os valores viram centavos inteiros (int64)
+# e cada arredondamento segue uma regra definida, 'half_even' (meio para o par,
+# como o round do numpy) ou 'half_up' (meio para longe do zero, como nos
+# contratos), em aritmética inteira vetorizada. No float64 a cadeia de 40 anos
+# de mensais arredondadas pode se afastar um centavo do valor exato.
+
+import os
+from fractions import Fraction
+
+import numpy as np
+
+ARREDONDAMENTOS = ('half_even', 'half_up')
+# Regra usada quando a requisição não escolhe uma; sem valor, o cálculo continua em float64.
+ARREDONDAMENTO_PADRAO = os.getenv('CALCULADORA_ARREDONDAMENTO') or None
+_MAX_INT64 = np.iinfo(np.int64).max
+# Inteiros até aqui são exatos em float64 com folga para a divisão e o +0,5 do arredondamento.
+_LIMITE_FLOAT = 2 ** 50
+
+def validar_arredondamento(arredondamento):
+    if arredondamento is not None and arredondamento not in ARREDONDAMENTOS:
+        raise ValueError(f"Arredondamento inválido: '{arredondamento}'. Use {' ou '.join(ARREDONDAMENTOS)}.")
+    return arredondamento
+
+if ARREDONDAMENTO_PADRAO: validar_arredondamento(ARREDONDAMENTO_PADRAO)
+
+def fracao_decimal(valor):
+    """Fração exata do número como ele é escrito (9.5 -> 19/2), e não do binário do float."""
+    fracao = Fraction(str(valor))
+    if fracao.denominator > 10 ** 12: raise ValueError(f"Valor com casas decimais demais para o modo exato: {valor}.")
+    return fracao
+
+def para_centavos(valores):
+    """Reais (float) -> centavos (int64). Os valores vindos das planilhas já têm no máximo 2 casas."""
+    valores = np.asarray(valores, dtype=np.float64)
+    if np.isnan(valores).any(): raise ValueError("O modo exato não aceita valores ausentes.")
+    centavos = np.rint(valores * 100)
+    if np.abs(centavos).max(initial=0) > 2 ** 53: raise ValueError("Valores grandes demais para o modo exato.")
+    return centavos.astype(np.int64)
+
+def para_reais(centavos):
+    """Centavos -> reais. O float resultante é o mais próximo do valor exato, e é ele que o JSON/CSV escreve."""
+    return np.asarray(centavos, dtype=np.int64) / 100
+
+def dividir(numerador, denominador, arredondamento):
+    """numerador / denominador (inteiro positivo), arredondado para inteiro pela regra escolhida."""
+    numerador = np.asarray(numerador, dtype=np.int64)
+    quociente, resto = np.divmod(np.abs(numerador), denominador)
+    dobro = 2 * resto
+    if arredondamento == 'half_up':
+        quociente += dobro >= denominador
+    else:
+        quociente += (dobro > denominador) | ((dobro == denominador) & (quociente % 2 == 1))
+    return np.where(numerador < 0, -quociente, quociente)
+
+def multiplicar(centavos, fracao, arredondamento):
+    """centavos * fracao, arredondado para centavos inteiros."""
+    centavos = np.asarray(centavos, dtype=np.int64)
+    if np.abs(centavos).max(initial=0) > _MAX_INT64 // max(abs(fracao.numerator), 1):
+        raise ValueError("Valores grandes demais para o modo exato.")
+    return dividir(centavos * fracao.numerator, fracao.denominator, arredondamento)
+
+def centavos_de(valor, arredondamento):
+    """Um valor em reais (como digitado) em centavos inteiros."""
+    fracao = fracao_decimal(valor) * 100
+    return int(dividir(np.array([fracao.numerator]), fracao.denominator, arredondamento)[0])
+
+def _dividir_float(numerador, denominador, arredondamento, out, positivos=False):
+    """Mesmo resultado de `dividir` para inteiros guardados em float64 com |numerador| < _LIMITE_FLOAT.
+
+    Abaixo desse limite o erro da divisão em float é menor que a distância de
+    qualquer quociente que não seja empate até o meio (1/2d), e os empates
+    (k + 0,5) são representados exatamente; então rint/trunc decidem como a
+    conta inteira decidiria, sem divmod de int64 (bem mais lento).
+    """
+    np.divide(numerador, denominador, out=out)
+    if arredondamento == 'half_up':
+        out += 0.5 if positivos else np.copysign(0.5, out)
+        return np.trunc(out, out=out)
+    return np.rint(out, out=out)
+
+def gerar_matriz_centavos(saldo_centavos, prazo_anos, taxa_juros_anual, arredondamento, dtype=np.int64):
+    """Como gerar_matriz_mensais, em centavos: cada ano é o anterior vezes (1 + taxa/100), arredondado.
+
+    Com dtype=float64, a matriz tem os mesmos centavos inteiros, guardados em float
+    (evita uma conversão para quem vai dividir por 100 em seguida).
+    """
+    total_meses = prazo_anos * 12
+    if total_meses <= 0: raise ValueError("O prazo em anos deve ser maior que zero.")
+    saldo = np.asarray(saldo_centavos, dtype=np.int64)
+    fator = 1 + fracao_decimal(taxa_juros_anual) / 100
+    matriz = np.empty((saldo.shape[0], prazo_anos), dtype=dtype, order='F')
+
+    # Maior mensal possível ao longo do prazo (cada ano cresce pelo fator e meio centavo de arredondamento)
+    maior = int(np.abs(saldo).max(initial=0)) / total_meses + 0.5
+    for _ in range(1, prazo_anos): maior = maior * abs(float(fator)) + 0.5
+    if max(int(np.abs(saldo).max(initial=0)), maior * abs(fator.numerator)) < _LIMITE_FLOAT:
+        positivos = fator > 0 and bool((saldo >= 0).all())
+        mensal = np.empty(saldo.shape[0], dtype=np.float64)
+        _dividir_float(saldo.astype(np.float64), total_meses, arredondamento, mensal, positivos)
+        matriz[:, 0] = mensal
+        for ano in range(1, prazo_anos):
+            mensal *= fator.numerator
+            _dividir_float(mensal, fator.denominator, arredondamento, mensal, positivos)
+            matriz[:, ano] = mensal
+        return matriz
+
+    matriz[:, 0] = dividir(saldo, total_meses, arredondamento)
+    for ano in range(1, prazo_anos):
+        matriz[:, ano] = multiplicar(matriz[:, ano - 1], fator, arredondamento)
+    return matriz
@@ -0,0 +1,145 @@
+# Arquivo: backend/core/consultas.py
+# Consultas sobre uma tabela de lotes já carregada: filtros por ETAPA/BLOCO com
+# um índice de categorias, páginas ordenadas e resumos por grupo. Não depende
+# dos outros módulos do core, para poder ser usado também pelo app Streamlit.
+
+import numpy as np
+import pandas as pd
+
+COLUNAS_CATEGORIAS = ('ETAPA', 'BLOCO')
+
+class IndiceCategorias:
+    """Códigos inteiros (factorize) das colunas ETAPA e BLOCO, na ordem das linhas.
+
+    As categorias ficam ordenadas, então ordenar pelos códigos é o mesmo que
+    ordenar pelos valores. Valores ausentes ficam com código -1. Como os
+    demais índices derivados, só depende das colunas indexadas e da ordem das linhas.
+    """
+
+    def __init__(self, df_lotes, colunas=COLUNAS_CATEGORIAS):
+        self.n_linhas = len(df_lotes)
+        self.codigos, self.categorias = {}, {}
+        for coluna in colunas:
+            if coluna in df_lotes.columns:
+                self.codigos[coluna], self.categorias[coluna] = pd.factorize(df_lotes[coluna], sort=True)
+        # Medido uma vez: códigos mais as categorias com os bytes das strings (memory_usage deep)
+        self._nbytes = sum(int(codigos.nbytes) for codigos in self.codigos.values()) + sum(
+            int(pd.Series(categorias, copy=False).memory_usage(index=False, deep=True)) for categorias in self.categorias.values())
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def valores(self, coluna):
+        return self.categorias[coluna].tolist()
+
+    def mascara(self, **valores_por_coluna):
+        """Máscara booleana das linhas cujas colunas têm um dos valores pedidos.
+
+        Os valores são comparados como texto (str), como em filtrar_lotes. Colunas
+        sem valores (None ou lista vazia) ou fora do índice não filtram.
+        """
+        mascara = np.ones(self.n_linhas, dtype=bool)
+        for coluna, valores in valores_por_coluna.items():
+            if not valores or coluna not in self.codigos: continue
+            categorias = self.categorias[coluna]
+            escolhidos = np.flatnonzero(np.isin(categorias.astype(str), [str(valor) for valor in valores]))
+            mascara &= np.isin(self.codigos[coluna], escolhidos)
+        return mascara
+
+def _nativo(valor):
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+def filtrar_posicoes(df_lotes, indice, etapas=None, blocos=None, unidades=None):
+    """Posições (iloc) das linhas que passam nos filtros, na ordem da tabela."""
+    mascara = indice.mascara(ETAPA=etapas, BLOCO=blocos)
+    if unidades and 'UNIDADE' in df_lotes.columns:
+        mascara &= df_lotes['UNIDADE'].astype(str).isin(unidades).to_numpy()
+    return np.flatnonzero(mascara)
+
+def validar_ordenacao(df_lotes, ordenar_por):
+    if ordenar_por and ordenar_por not in df_lotes.columns:
+        raise ValueError(f"Não é possível ordenar pela coluna '{ordenar_por}': ela não existe na tabela.")
+    return ordenar_por
+
+def validar_agrupamento(agrupar_por):
+    invalidas = [coluna for coluna in agrupar_por if coluna not in COLUNAS_CATEGORIAS]
+    if invalidas: raise ValueError(f"Só é possível agrupar por {', '.join(COLUNAS_CATEGORIAS)}; recebido: {', '.join(invalidas)}.")
+    return agrupar_por
+
+def ordenar_posicoes(df_lotes, indice, posicoes, ordenar_por=None, decrescente=False):
+    """Reordena as posições pela coluna pedida (ordenação estável; ausentes no fim)."""
+    if not validar_ordenacao(df_lotes, ordenar_por): return posicoes
+    if ordenar_por in indice.codigos:
+        chave = pd.Series(indice.codigos[ordenar_por][posicoes]).replace(-1, np.nan)
+    else:
+        chave = pd.Series(df_lotes[ordenar_por].to_numpy()[posicoes])
+    ordem = chave.sort_values(ascending=not decrescente, kind='stable', na_position='last').index.to_numpy()
+    return posicoes[ordem]
+
+def paginar(df_lotes, indice, filtros=None, ordenar_por=None, decrescente=False, pagina=1, tamanho_pagina=100):
+    """Retorna (df_pagina, total_linhas) com as linhas da página pedida (a primeira é 1)."""
+    posicoes = filtrar_posicoes(df_lotes, indice, **(filtros or {}))
+    posicoes = ordenar_posicoes(df_lotes, indice, posicoes, ordenar_por, decrescente)
+    inicio = (pagina - 1) * tamanho_pagina
+    return df_lotes.iloc[posicoes[inicio:inicio + tamanho_pagina]], len(posicoes)
+
+def _mensal_ano_01_exata(valores, entradas, total_meses, arredondamento):
+    """Mensal do ano 1 no modo exato, como em core/centavos.py (gerar_matriz_centavos).
+
+    Repetida aqui para o módulo continuar independente do core. Saldos em
+    centavos abaixo de 2**50 são exatos em float64, e a divisão decide o
+    arredondamento como a conta inteira decidiria. Ausentes continuam NaN.
+    """
+    quociente = (np.rint(valores * 100) - np.rint(entradas * 100)) / total_meses
+    if arredondamento == 'half_up':
+        return np.trunc(quociente + np.copysign(0.5, quociente)) / 100
+    return np.rint(quociente) / 100
+
+def resumir_grupos(df_lotes, indice, agrupar_por=COLUNAS_CATEGORIAS, filtros=None, prazo_anos=None, arredondamento=None):
+    """Resumo por grupo: quantidade de lotes, total à vista e, com `prazo_anos`, a mensal média do ano 1.
+
+    A mensal do ano 1 é o saldo dividido pelos meses do prazo, arredondado como em
+    gerar_matriz_mensais (ou, com `arredondamento`, como no modo exato em centavos);
+    não depende da taxa. Grupos vazios não aparecem.
+    """
+    agrupar_por = [coluna for coluna in validar_agrupamento(agrupar_por) if coluna in indice.codigos]
+    if prazo_anos is not None and prazo_anos <= 0: raise ValueError("O prazo em anos deve ser maior que zero.")
+    posicoes = filtrar_posicoes(df_lotes, indice, **(filtros or {}))
+
+    # Um único código por combinação de grupos; o -1 (ausente) vira a última categoria.
+    grupo = np.zeros(len(posicoes), dtype=np.int64)
+    tamanhos = []
+    for coluna in agrupar_por:
+        codigos = indice.codigos[coluna][posicoes]
+        tamanho = len(indice.categorias[coluna]) + 1
+        grupo = grupo * tamanho + np.where(codigos < 0, tamanho - 1, codigos)
+        tamanhos.append(tamanho)
+    n_grupos = int(np.prod(tamanhos)) if tamanhos else 1
+
+    def somar(valores):
+        validos = ~np.isnan(valores)
+        return np.bincount(grupo, weights=np.where(validos, valores, 0), minlength=n_grupos), np.bincount(grupo, weights=validos, minlength=n_grupos)
+
+    quantidade = np.bincount(grupo, minlength=n_grupos)
+    valores = df_lotes['VALOR_A_VISTA'].to_numpy(dtype=np.float64)[posicoes]
+    total_valor, _ = somar(valores)
+    if prazo_anos is not None:
+        entradas = df_lotes['ENTRADA'].to_numpy(dtype=np.float64)[posicoes]
+        if arredondamento: mensal = _mensal_ano_01_exata(valores, entradas, prazo_anos * 12, arredondamento)
+        else: mensal = np.round((valores - entradas) / (prazo_anos * 12), 2)
+        soma_mensal, n_mensal = somar(mensal)
+
+    resumo = []
+    for codigo_grupo in np.flatnonzero(quantidade):
+        linha, resto = {}, int(codigo_grupo)
+        for coluna, tamanho in zip(reversed(agrupar_por), reversed(tamanhos)):
+            resto, codigo = divmod(resto, tamanho)
+            linha[coluna] = _nativo(indice.categorias[coluna][codigo]) if codigo < tamanho - 1 else None
+        linha = dict(reversed(linha.items()))
+        linha['quantidade_lotes'] = int(quantidade[codigo_grupo])
+        linha['total_valor_a_vista'] = round(float(total_valor[codigo_grupo]), 2)
+        if prazo_anos is not None:
+            linha['media_mensal_ano_01'] = round(float(soma_mensal[codigo_grupo] / n_mensal[codigo_grupo]), 2) if n_mensal[codigo_grupo] else None
+        resumo.append(linha)
+    return resumo
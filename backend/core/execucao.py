@@ -0,0 +1,66 @@
+# Arquivo: backend/core/execucao.py
+# Executa o trabalho pesado com DataFrames (leitura de planilhas, cálculos,
+# serialização) fora do event loop, num pool de threads ou de processos com
+# fila limitada. Tabelas pequenas continuam rodando direto no handler.
+
+import os
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# 'thread', 'processo' ou 'inline' (tudo no event loop, como antes).
+MODO_PADRAO = os.getenv('CALCULADORA_EXECUTOR', 'thread')
+WORKERS_PADRAO = int(os.getenv('CALCULADORA_EXECUTOR_WORKERS', str(min(4, os.cpu_count() or 1))))
+# Tarefas aceitas além das que já estão rodando; acima disso a API responde 503.
+FILA_PADRAO = int(os.getenv('CALCULADORA_EXECUTOR_FILA', '16'))
+# Abaixo destes tamanhos a ida e volta ao pool custa mais do que o próprio trabalho.
+INLINE_MAX_LINHAS = int(os.getenv('CALCULADORA_INLINE_MAX_LINHAS', '2000'))
+INLINE_MAX_BYTES = int(os.getenv('CALCULADORA_INLINE_MAX_BYTES', str(256 * 1024)))
+
+class ExecutorSobrecarregado(RuntimeError):
+    """Todas as vagas do pool e da fila estão ocupadas."""
+
+class ExecutorLimitado:
+    """Pool de execução com um número máximo de tarefas pendentes.
+
+    No modo 'processo' as funções e os argumentos precisam ser serializáveis
+    (funções de módulo, DataFrames, bytes), e o resultado volta por cópia.
+    """
+
+    def __init__(self, modo=MODO_PADRAO, workers=WORKERS_PADRAO, fila=FILA_PADRAO):
+        if modo not in ('thread', 'processo', 'inline'):
+            raise ValueError(f"Modo de execução inválido: '{modo}'. Use 'thread', 'processo' ou 'inline'.")
+        self.modo = modo
+        self.workers = workers
+        self.max_pendentes = workers + fila
+        self.pendentes = 0
+        self._pool = None
+
+    def _obter_pool(self):
+        if self._pool is None:
+            classe = ProcessPoolExecutor if self.modo == 'processo' else ThreadPoolExecutor
+            self._pool = classe(max_workers=self.workers)
+        return self._pool
+
+    async def executar(self, funcao, *args, inline=False, **kwargs):
+        """Roda `funcao(*args, **kwargs)` no pool e aguarda o resultado.
+
+        Com `inline=True` (trabalho pequeno) ou no modo 'inline' a função roda
+        direto, sem passar pela fila. Levanta ExecutorSobrecarregado se a fila
+        estiver cheia.
+        """
+        if inline or self.modo == 'inline':
+            return funcao(*args, **kwargs)
+        # Só o event loop mexe no contador, então não precisa de lock.
+        if self.pendentes >= self.max_pendentes:
+            raise ExecutorSobrecarregado("O servidor está ocupado processando outras planilhas. Tente novamente em instantes.")
+        self.pendentes += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._obter_pool(), partial(funcao, *args, **kwargs))
+        finally:
+            self.pendentes -= 1
+
+    def encerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,84 @@
+# Arquivo: backend/core/formatacao.py
+# Formatação de moeda (R$ 1.234,56) para colunas inteiras, usada pela exportação
+# de CSV da API e pelo app Streamlit.
+
+import numpy as np
+import pandas as pd
+
+# Acima disso (em centavos) o float64 já não separa bem as frações de centavo.
+_LIMITE_CENTAVOS_EXATOS = 2.0 ** 44
+# Distância mínima de um empate (x,xx5) para confiar no arredondamento de x * 100.
+_MARGEM_EMPATE = 2.0 ** -7
+# 2**44 centavos cabem em 12 dígitos na parte inteira: 'R$ -999.999.999.999,99'.
+_MAX_DIGITOS = 12
+_LARGURA = len('R$ -') + _MAX_DIGITOS + (_MAX_DIGITOS - 1) // 3 + len(',00')
+_POTENCIAS_10 = 10 ** np.arange(1, _MAX_DIGITOS, dtype=np.int64)
+_ZERO, _PONTO, _VIRGULA = ord('0'), ord('.'), ord(',')
+
+def formatar_moeda_brl(valor):
+    """Formata um único número como f'R$ {valor:,.2f}' no padrão brasileiro."""
+    return f'R$ {valor:,.2f}'.replace(",", "X").replace(".", ",").replace("X", ".")
+
+def _formatar_floats(valores):
+    """Formata um array float64 com o mesmo resultado de formatar_moeda_brl em cada valor.
+
+    Os caracteres são montados numa matriz de bytes alinhada à direita (um dígito
+    por coluna) e depois recortados por largura final, sem laço por célula.
+    """
+    n_valores = len(valores)
+    centavos_float = np.abs(valores) * 100
+    with np.errstate(invalid='ignore'):
+        fracao = centavos_float - np.floor(centavos_float)
+        # Perto de um empate, ou para valores enormes/NaN/inf, x * 100 em float pode
+        # arredondar diferente do f-string; esses casos vão pelo caminho escalar.
+        rapido = (centavos_float < _LIMITE_CENTAVOS_EXATOS) & (np.abs(fracao - 0.5) > _MARGEM_EMPATE)
+    inteiros, centavos = np.divmod(np.floor(np.where(rapido, centavos_float, 0) + 0.5).astype(np.int64), 100)
+
+    caracteres = np.empty((n_valores, _LARGURA), dtype=np.uint8)
+    caracteres[:, -1] = _ZERO + centavos % 10
+    caracteres[:, -2] = _ZERO + centavos // 10
+    caracteres[:, -3] = _VIRGULA
+    # Seis dígitos de cada vez cabem em int32, que é bem mais rápido de dividir.
+    metades = [(inteiros % 1_000_000).astype(np.int32), (inteiros // 1_000_000).astype(np.int32)]
+    for digito in range(_MAX_DIGITOS):
+        metade = metades[digito // 6]
+        coluna = _LARGURA - 4 - digito - digito // 3
+        caracteres[:, coluna] = _ZERO + metade % 10
+        metade //= 10
+        if digito % 3 == 2 and digito < _MAX_DIGITOS - 1: caracteres[:, coluna - 1] = _PONTO
+
+    n_digitos = 1 + np.searchsorted(_POTENCIAS_10, inteiros, side='right')
+    negativo = np.signbit(valores)
+    largura_numero = n_digitos + (n_digitos - 1) // 3 + 3
+    # Linhas com a mesma largura final são recortadas juntas.
+    chave = largura_numero * 2 + negativo
+    texto = np.empty(n_valores, dtype=object)
+    for valor_chave in np.flatnonzero(np.bincount(chave)):
+        linhas = np.flatnonzero(chave == valor_chave)
+        prefixo = b'R$ -' if valor_chave % 2 else b'R$ '
+        largura = valor_chave // 2 + len(prefixo)
+        recorte = caracteres[linhas, _LARGURA - largura:]
+        recorte[:, :len(prefixo)] = np.frombuffer(prefixo, dtype=np.uint8)
+        texto[linhas] = recorte.view(f'S{largura}').ravel().astype(f'U{largura}')
+    for indice in np.flatnonzero(~rapido):
+        texto[indice] = formatar_moeda_brl(float(valores[indice]))
+    return texto
+
+def formatar_moeda_brl_coluna(valores, texto_nulo=None):
+    """Formata uma coluna inteira (Series ou array) como moeda brasileira.
+
+    Colunas numéricas são formatadas de forma vetorizada. Em colunas de outros
+    tipos só os números são formatados e o resto é mantido como está. Se
+    `texto_nulo` for informado, ele substitui os valores ausentes (NaN).
+    """
+    serie = valores if isinstance(valores, pd.Series) else pd.Series(valores)
+    if serie.dtype.kind in 'iuf':
+        numeros = serie.to_numpy(dtype=np.float64)
+        texto = _formatar_floats(numeros)
+        nulos = np.isnan(numeros)
+    else:
+        texto = np.array([formatar_moeda_brl(valor) if isinstance(valor, (int, float)) else valor for valor in serie], dtype=object)
+        nulos = serie.isna().to_numpy()
+    if texto_nulo is not None:
+        texto[nulos] = texto_nulo
+    return pd.Series(texto, index=serie.index, name=serie.name) if isinstance(valores, pd.Series) else texto
@@ -0,0 +1,72 @@
+# Arquivo: backend/core/indice_unidades.py
+# Índice de chaves normalizadas de UNIDADE (ou BLOCO + UNIDADE) usado para
+# combinar planilhas de entradas com a tabela principal.
+
+import numpy as np
+import pandas as pd
+
+def normalizar_chaves(serie):
+    """Normaliza códigos de unidade: sem espaços, maiúsculo e sem zeros à esquerda.
+
+    Ex.: ' lt 007 ', 'LT7' e 'Lt 07' viram todos 'LT7'. Valores vazios ficam NaN.
+    """
+    texto = serie.astype(str).str.upper().str.replace(r'\s+', '', regex=True)
+    texto = texto.str.replace(r'(?<!\d)0+(?=\d)', '', regex=True)
+    return texto.where(serie.notna() & (texto != ''))
+
+def montar_chaves(df, usar_bloco=False):
+    chaves = normalizar_chaves(df['UNIDADE'])
+    if usar_bloco:
+        if 'BLOCO' not in df.columns:
+            raise ValueError("Para combinar por BLOCO + UNIDADE as duas planilhas precisam da coluna 'BLOCO'.")
+        chaves = normalizar_chaves(df['BLOCO']) + '|' + chaves
+    return chaves
+
+class IndiceUnidades:
+    """Chaves normalizadas da tabela principal, calculadas uma única vez.
+
+    O índice depende apenas das colunas UNIDADE/BLOCO e da ordem das linhas, então
+    pode ser reaproveitado em vários merges seguidos sobre a mesma tabela.
+    """
+
+    def __init__(self, df_principal, usar_bloco=False):
+        self.usar_bloco = usar_bloco
+        self.n_linhas = len(df_principal)
+        self.chaves = montar_chaves(df_principal, usar_bloco).to_numpy(dtype=object)
+        # Medido uma vez (o índice não muda): ponteiros mais os bytes de cada string, como memory_usage(deep=True)
+        self._nbytes = int(pd.Series(self.chaves, copy=False).memory_usage(index=False, deep=True))
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def combinar(self, df_principal, df_entradas):
+        """Copia ENTRADA das entradas para a tabela principal, sem multiplicar linhas.
+
+        Unidades repetidas nas entradas ficam com a última linha. Retorna o novo
+        DataFrame (mesmas linhas e índice da tabela principal) e um relatório com
+        as contagens de casados, sem correspondência, duplicados e não utilizados.
+        """
+        if len(df_principal) != self.n_linhas:
+            raise ValueError("O índice de unidades não corresponde à tabela informada.")
+        chaves_entradas = montar_chaves(df_entradas, self.usar_bloco)
+        validas = chaves_entradas.notna().to_numpy()
+        chaves_entradas = chaves_entradas[validas]
+        valores_entradas = df_entradas['ENTRADA'].to_numpy(dtype=np.float64)[validas]
+
+        duplicadas = chaves_entradas.duplicated(keep='last').to_numpy()
+        indice_entradas = pd.Index(chaves_entradas[~duplicadas])
+        posicoes = indice_entradas.get_indexer(self.chaves)
+        casadas = posicoes >= 0
+
+        entrada = np.zeros(self.n_linhas, dtype=np.float64)
+        entrada[casadas] = valores_entradas[~duplicadas][posicoes[casadas]]
+        df_merged = df_principal.copy()
+        df_merged['ENTRADA'] = entrada
+        relatorio = {
+            'casados': int(casadas.sum()),
+            'sem_correspondencia': int((~casadas).sum()),
+            'duplicados': int(duplicadas.sum()),
+            'nao_utilizados': int(len(indice_entradas) - np.count_nonzero(np.bincount(posicoes[casadas], minlength=len(indice_entradas)))),
+        }
+        return df_merged, relatorio
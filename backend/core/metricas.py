@@ -0,0 +1,150 @@
+# Arquivo: backend/core/metricas.py
+# Medição do tempo de cada etapa das requisições (leitura do arquivo enviado,
+# decodificação, read_csv, parse_moeda, cálculo, serialização...) e contagem
+# de linhas/bytes, com exportação no formato texto do Prometheus.
+#
+# O FastAPI interpreta o corpo multipart antes do handler rodar, então esse
+# tempo não está em nenhuma etapa, só no total da requisição; 'leitura_arquivo'
+# é só a leitura do UploadFile já recebido.
+#
+# As etapas são anotadas com `etapa(nome)` onde o trabalho acontece. Quem
+# coleta é a requisição (middleware em main.py); o trabalho que roda no pool
+# do executor é coletado por `coletar_etapas` e devolvido junto com o
+# resultado, então funciona também no modo 'processo'.
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Liga o cabeçalho Server-Timing nas respostas.
+SERVER_TIMING = os.getenv('CALCULADORA_SERVER_TIMING', '0').lower() in ('1', 'true', 'sim')
+LIMITES_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+class Medicoes:
+    """Etapas (nome, segundos) e contadores de linhas/bytes por etapa de uma requisição."""
+
+    def __init__(self):
+        self.etapas = []
+        self.linhas = {}
+        self.bytes = {}
+
+    def juntar(self, outras):
+        self.etapas.extend(outras.etapas)
+        for nome, quantidade in outras.linhas.items(): self.linhas[nome] = self.linhas.get(nome, 0) + quantidade
+        for nome, quantidade in outras.bytes.items(): self.bytes[nome] = self.bytes.get(nome, 0) + quantidade
+
+    def server_timing(self):
+        """Valor do cabeçalho Server-Timing, somando as etapas repetidas (em ms)."""
+        total = {}
+        for nome, segundos in self.etapas: total[nome] = total.get(nome, 0) + segundos
+        return ', '.join(f'{nome};dur={segundos * 1000:.1f}' for nome, segundos in total.items())
+
+_medicoes = ContextVar('medicoes', default=None)
+
+def iniciar_medicoes():
+    """Começa a coletar as etapas do contexto atual; retorna as medições e o token para `encerrar_medicoes`."""
+    medicoes = Medicoes()
+    return medicoes, _medicoes.set(medicoes)
+
+def encerrar_medicoes(token):
+    _medicoes.reset(token)
+
+@contextmanager
+def etapa(nome):
+    """Mede o tempo do bloco; fora de uma coleta não faz nada."""
+    medicoes = _medicoes.get()
+    if medicoes is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicoes.etapas.append((nome, time.perf_counter() - inicio))
+
+def contar(nome, linhas=None, tamanho_bytes=None):
+    medicoes = _medicoes.get()
+    if medicoes is None: return
+    if linhas is not None: medicoes.linhas[nome] = medicoes.linhas.get(nome, 0) + linhas
+    if tamanho_bytes is not None: medicoes.bytes[nome] = medicoes.bytes.get(nome, 0) + tamanho_bytes
+
+def coletar_etapas(funcao, *args, **kwargs):
+    """Roda `funcao` coletando as etapas dela; retorna (resultado, medições). Usado dentro do executor."""
+    medicoes, token = iniciar_medicoes()
+    try:
+        return funcao(*args, **kwargs), medicoes
+    finally:
+        encerrar_medicoes(token)
+
+def juntar_medicoes(medicoes):
+    """Junta medições vindas do executor às da requisição atual."""
+    atuais = _medicoes.get()
+    if atuais is not None: atuais.juntar(medicoes)
+
+class Histograma:
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = limites
+        self.contagens = [0] * len(limites)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        for i, limite in enumerate(self.limites):
+            if valor <= limite: self.contagens[i] += 1
+        self.soma += valor
+        self.total += 1
+
+def _rotulos(rotulos):
+    return ','.join(f'{nome}="{str(valor)}"' for nome, valor in rotulos)
+
+class RegistroMetricas:
+    """Histogramas de latência e contadores acumulados desde o início do servidor."""
+
+    def __init__(self):
+        self._requisicoes = {}
+        self._etapas = {}
+        self._linhas = {}
+        self._bytes = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, rota, metodo, status, segundos, medicoes):
+        with self._lock:
+            self._requisicoes.setdefault((('rota', rota), ('metodo', metodo), ('status', status)), Histograma()).observar(segundos)
+            for nome, duracao in medicoes.etapas:
+                self._etapas.setdefault((('rota', rota), ('etapa', nome)), Histograma()).observar(duracao)
+            for contadores, acumulado in ((medicoes.linhas, self._linhas), (medicoes.bytes, self._bytes)):
+                for nome, quantidade in contadores.items():
+                    chave = (('rota', rota), ('etapa', nome))
+                    acumulado[chave] = acumulado.get(chave, 0) + quantidade
+
+    def exportar(self, extras=()):
+        """Texto no formato de exposição do Prometheus (0.0.4).
+
+        `extras` são tuplas (nome, tipo, ajuda, [(rotulos, valor), ...]) com
+        métricas de outras partes do servidor, lidas na hora.
+        """
+        linhas = []
+        with self._lock:
+            for nome, ajuda, histogramas in (
+                ('calculadora_requisicao_segundos', 'Latência das requisições, do início ao fim do corpo da resposta.', self._requisicoes),
+                ('calculadora_etapa_segundos', 'Duração de cada etapa do processamento (a interpretação do multipart só entra no total da requisição).', self._etapas),
+            ):
+                linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} histogram']
+                for rotulos, histograma in sorted(histogramas.items()):
+                    base = _rotulos(rotulos)
+                    for limite, contagem in zip(histograma.limites, histograma.contagens):
+                        linhas.append(f'{nome}_bucket{{{base},le="{limite}"}} {contagem}')
+                    linhas.append(f'{nome}_bucket{{{base},le="+Inf"}} {histograma.total}')
+                    linhas.append(f'{nome}_sum{{{base}}} {histograma.soma}')
+                    linhas.append(f'{nome}_count{{{base}}} {histograma.total}')
+            contadores = [
+                ('calculadora_etapa_linhas_total', 'counter', 'Linhas processadas por etapa.', sorted(self._linhas.items())),
+                ('calculadora_etapa_bytes_total', 'counter', 'Bytes lidos ou gerados por etapa.', sorted(self._bytes.items())),
+            ]
+        for nome, tipo, ajuda, valores in contadores + list(extras):
+            linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} {tipo}']
+            for rotulos, valor in valores:
+                linhas.append(f'{nome}{{{_rotulos(rotulos)}}} {valor}' if rotulos else f'{nome} {valor}')
+        return '\n'.join(linhas) + '\n'
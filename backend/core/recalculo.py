@@ -0,0 +1,117 @@
+# Arquivo: backend/core/recalculo.py
+# Recálculo incremental das mensais de uma tabela guardada no servidor: guarda
+# a última matriz calculada e, na chamada seguinte, refaz só as linhas cujos
+# valores mudaram ou, numa troca de taxa, só os anos que dependem dela.
+
+import uuid
+
+import numpy as np
+
+from core.calculator import matriz_mensais, nomes_colunas_mensais
+
+def _diferentes(novos, antigos):
+    with np.errstate(invalid='ignore'):
+        return (novos != antigos) & ~(np.isnan(novos) & np.isnan(antigos))
+
+class CalculoIncremental:
+    """Última matriz de mensais calculada para uma tabela e os parâmetros usados.
+
+    Os objetos não são alterados depois de criados: `atualizar` devolve um novo
+    estado, então o mesmo estado pode ser lido por várias requisições ao mesmo tempo.
+    Cada estado tem uma `versao` única, que vai no diff para o cliente mandar de volta.
+    """
+
+    def __init__(self, valores, entradas, prazo_anos, taxa_juros_anual, matriz, arredondamento=None):
+        self.versao = uuid.uuid4().hex
+        self.valores = valores
+        self.entradas = entradas
+        self.prazo_anos = prazo_anos
+        self.taxa_juros_anual = taxa_juros_anual
+        self.matriz = matriz
+        self.arredondamento = arredondamento
+
+    @property
+    def nbytes(self):
+        return self.valores.nbytes + self.entradas.nbytes + self.matriz.nbytes
+
+    @classmethod
+    def calcular(cls, df_lotes, prazo_anos, taxa_juros_anual, arredondamento=None):
+        valores = df_lotes['VALOR_A_VISTA'].to_numpy(dtype=np.float64, copy=True)
+        entradas = df_lotes['ENTRADA'].to_numpy(dtype=np.float64, copy=True)
+        matriz = matriz_mensais(valores, entradas, prazo_anos, taxa_juros_anual, arredondamento)
+        return cls(valores, entradas, prazo_anos, taxa_juros_anual, matriz, arredondamento)
+
+    def atualizar(self, df_lotes, prazo_anos, taxa_juros_anual, arredondamento=None):
+        """Recalcula a tabela com os novos valores e parâmetros.
+
+        Retorna (novo_estado, diff). O resultado é idêntico ao de calcular_mensais
+        (com o mesmo `arredondamento`); só muda quanto trabalho é refeito:
+        - prazo ou arredondamento diferente, ou outra quantidade de lotes: tudo é recalculado;
+        - VALOR_A_VISTA/ENTRADA alterados: só as linhas alteradas;
+        - taxa diferente: o 1º ano (que não depende da taxa) é mantido e os demais
+          anos são recalculados a partir dele; no modo exato, todos os anos.
+        """
+        if prazo_anos != self.prazo_anos or arredondamento != self.arredondamento or len(df_lotes) != len(self.valores):
+            novo = CalculoIncremental.calcular(df_lotes, prazo_anos, taxa_juros_anual, arredondamento)
+            return novo, diff_completo(df_lotes, novo, colunas_removidas=nomes_colunas_mensais(self.prazo_anos)[prazo_anos:])
+
+        valores = df_lotes['VALOR_A_VISTA'].to_numpy(dtype=np.float64, copy=True)
+        entradas = df_lotes['ENTRADA'].to_numpy(dtype=np.float64, copy=True)
+        linhas_sujas = np.flatnonzero(_diferentes(valores, self.valores) | _diferentes(entradas, self.entradas))
+        matriz = self.matriz.copy(order='F')
+        if len(linhas_sujas):
+            matriz[linhas_sujas] = matriz_mensais(valores[linhas_sujas], entradas[linhas_sujas], prazo_anos, taxa_juros_anual, arredondamento)
+        linhas_recalculadas = linhas_sujas
+        if taxa_juros_anual != self.taxa_juros_anual and prazo_anos > 1 and arredondamento:
+            matriz = matriz_mensais(valores, entradas, prazo_anos, taxa_juros_anual, arredondamento)
+            linhas_recalculadas = np.arange(len(valores))
+        elif taxa_juros_anual != self.taxa_juros_anual and prazo_anos > 1:
+            fator = 1 + taxa_juros_anual / 100
+            for ano in range(1, prazo_anos):
+                np.multiply(matriz[:, ano - 1], fator, out=matriz[:, ano])
+                np.round(matriz[:, ano], 2, out=matriz[:, ano])
+            linhas_recalculadas = np.arange(len(valores))
+
+        novo = CalculoIncremental(valores, entradas, prazo_anos, taxa_juros_anual, matriz, arredondamento)
+        celulas_alteradas = _diferentes(matriz[linhas_recalculadas], self.matriz[linhas_recalculadas])
+        linhas = np.union1d(linhas_sujas, linhas_recalculadas[celulas_alteradas.any(axis=1)])
+        anos = np.flatnonzero(celulas_alteradas.any(axis=0))
+        colunas = {}
+        if len(linhas_sujas):
+            colunas['VALOR_A_VISTA'] = valores[linhas].tolist()
+            colunas['ENTRADA'] = entradas[linhas].tolist()
+        nomes = nomes_colunas_mensais(prazo_anos)
+        for ano in anos:
+            colunas[nomes[ano]] = matriz[linhas, ano].tolist()
+        return novo, {
+            'completo': False, 'versao': novo.versao, 'prazo_anos': prazo_anos, 'taxa_juros_anual': taxa_juros_anual,
+            'linhas': linhas.tolist(), 'colunas': colunas, 'colunas_removidas': [],
+        }
+
+def diff_completo(df_lotes, estado, colunas_removidas=()):
+    """Diff com todas as linhas e colunas: usado no primeiro cálculo e quando o prazo muda."""
+    colunas = {str(coluna): df_lotes[coluna].tolist() for coluna in df_lotes.columns}
+    colunas['VALOR_A_VISTA'] = estado.valores.tolist()
+    colunas['ENTRADA'] = estado.entradas.tolist()
+    for ano, nome in enumerate(nomes_colunas_mensais(estado.prazo_anos)):
+        colunas[nome] = estado.matriz[:, ano].tolist()
+    return {
+        'completo': True, 'versao': estado.versao, 'prazo_anos': estado.prazo_anos, 'taxa_juros_anual': estado.taxa_juros_anual,
+        'linhas': list(range(len(df_lotes))), 'colunas': colunas, 'colunas_removidas': list(colunas_removidas),
+    }
+
+def calcular_incremental(df_lotes, estado, prazo_anos, taxa_juros_anual, arredondamento=None, versao=None):
+    """Calcula a tabela a partir do estado anterior (ou do zero, se `estado` for None).
+
+    Retorna (novo_estado, diff), onde o diff traz as posições das linhas alteradas
+    e, para cada coluna alterada, os novos valores dessas linhas. `versao` é a do
+    estado sobre o qual o cliente aplica o diff; se não for a do estado guardado
+    (outra requisição o trocou, ou o cliente não informou), o diff vem completo.
+    """
+    if estado is None:
+        novo = CalculoIncremental.calcular(df_lotes, prazo_anos, taxa_juros_anual, arredondamento)
+        return novo, diff_completo(df_lotes, novo)
+    novo, diff = estado.atualizar(df_lotes, prazo_anos, taxa_juros_anual, arredondamento)
+    if versao != estado.versao and not diff['completo']:
+        diff = diff_completo(df_lotes, novo)
+    return novo, diff
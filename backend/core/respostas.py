@@ -0,0 +1,114 @@
+# Arquivo: backend/core/respostas.py
+# Serialização das tabelas devolvidas pela API. O formato padrão continua sendo
+# a lista de registros em JSON; os outros são opcionais, escolhidos pelo
+# parâmetro `formato` ou pelo cabeçalho Accept.
+
+import json
+import numpy as np
+
+from core.metricas import etapa, contar
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+FORMATO_PADRAO = 'registros'
+TIPOS_MIDIA = {
+    'registros': 'application/json',
+    # {"COLUNA": [valores...], ...}: cada nome de coluna aparece uma vez só.
+    'colunas': 'application/vnd.calculadora.colunas+json',
+    # Um registro JSON por linha.
+    'ndjson': 'application/x-ndjson',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+FORMATOS_POR_TIPO = {tipo: formato for formato, tipo in TIPOS_MIDIA.items()}
+LINHAS_POR_BLOCO_NDJSON = 10000
+
+def escolher_formato(formato=None, accept=None):
+    """Define o formato da resposta: o parâmetro `formato` tem prioridade sobre o Accept.
+
+    Levanta ValueError para formatos desconhecidos ou indisponíveis no servidor.
+    """
+    if formato is None and accept:
+        tipos = [tipo.split(';')[0].strip().lower() for tipo in accept.split(',')]
+        formato = next((FORMATOS_POR_TIPO[tipo] for tipo in tipos if tipo in FORMATOS_POR_TIPO), None)
+    formato = formato or FORMATO_PADRAO
+    if formato not in TIPOS_MIDIA:
+        raise ValueError(f"Formato de resposta inválido: '{formato}'. Use um destes: {', '.join(TIPOS_MIDIA)}.")
+    if formato == 'arrow' and pyarrow is None:
+        raise ValueError("O formato 'arrow' precisa do pacote pyarrow instalado no servidor.")
+    return formato
+
+def para_json(conteudo):
+    """Serializa listas/dicionários com os mesmos parâmetros do JSONResponse do FastAPI."""
+    return json.dumps(conteudo, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def registros_json(df):
+    """Serializa o DataFrame como lista de registros em JSON (bytes).
+
+    Gera o mesmo corpo que o FastAPI produziria retornando df.to_dict(orient='records'),
+    mas pode rodar fora do event loop, junto com o cálculo.
+    """
+    return para_json(df.to_dict(orient='records'))
+
+def _valores_coluna(serie):
+    """Valores da coluna para JSON, com null no lugar de NaN."""
+    valores = serie.to_numpy()
+    if valores.dtype.kind in 'iub':
+        return valores if orjson is not None else valores.tolist()
+    if valores.dtype.kind == 'f':
+        if orjson is not None: return valores
+        lista = valores.tolist()
+        for indice in np.flatnonzero(np.isnan(valores)): lista[indice] = None
+        return lista
+    return serie.astype(object).where(serie.notna(), None).tolist()
+
+def colunas_json(df):
+    """Serializa o DataFrame como {coluna: [valores]} em JSON (bytes).
+
+    Com orjson instalado, colunas numéricas são serializadas direto dos arrays numpy.
+    """
+    colunas = {str(coluna): _valores_coluna(df[coluna]) for coluna in df.columns}
+    if orjson is not None:
+        return orjson.dumps(colunas, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(colunas, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def registros_ndjson(df, linhas_por_bloco=LINHAS_POR_BLOCO_NDJSON):
+    """Serializa o DataFrame com um registro JSON por linha (bytes)."""
+    partes = []
+    for inicio in range(0, len(df), linhas_por_bloco):
+        bloco = df.iloc[inicio:inicio + linhas_por_bloco]
+        if orjson is not None:
+            # orjson já escreve NaN como null.
+            partes.extend(map(orjson.dumps, bloco.to_dict(orient='records')))
+        else:
+            registros = bloco.astype(object).where(bloco.notna(), None).to_dict(orient='records')
+            partes.extend(json.dumps(registro, ensure_ascii=False, separators=(",", ":")).encode("utf-8") for registro in registros)
+    return b'\n'.join(partes) + b'\n' if partes else b''
+
+def tabela_arrow(df):
+    """Serializa o DataFrame como stream IPC do Arrow (bytes)."""
+    tabela = pyarrow.Table.from_pandas(df, preserve_index=False)
+    destino = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(destino, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return destino.getvalue().to_pybytes()
+
+SERIALIZADORES = {
+    'registros': registros_json,
+    'colunas': colunas_json,
+    'ndjson': registros_ndjson,
+    'arrow': tabela_arrow,
+}
+
+def serializar_tabela(df, formato=FORMATO_PADRAO):
+    with etapa('serializacao'):
+        corpo = SERIALIZADORES[formato](df)
+    contar('serializacao', linhas=len(df), tamanho_bytes=len(corpo))
+    return corpo
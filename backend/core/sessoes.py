@@ -0,0 +1,119 @@
+# Arquivo: backend/core/sessoes.py
+# Guarda no servidor as tabelas de lotes já processadas, para que os clientes
+# enviem apenas o ID da tabela em vez da lista completa de lotes.
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+
+TTL_PADRAO_SEGUNDOS = int(os.getenv('CALCULADORA_TABELAS_TTL', '3600'))
+MAX_TABELAS_PADRAO = int(os.getenv('CALCULADORA_TABELAS_MAX', '64'))
+MEMORIA_MAX_PADRAO_MB = int(os.getenv('CALCULADORA_TABELAS_MEMORIA_MB', '512'))
+
+def tamanho_dataframe(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def tamanho_derivado(objeto):
+    """Bytes de um objeto derivado que expõe `nbytes` (arrays numpy e os índices de unidades e categorias); 0 nos demais."""
+    return int(getattr(objeto, 'nbytes', 0))
+
+class TabelasEmMemoria:
+    """Cache LRU de DataFrames com expiração (TTL) e limite de memória.
+
+    As tabelas guardadas não devem ser alteradas no lugar: quem precisar
+    modificar uma tabela deve trabalhar numa cópia e chamar `substituir`.
+    """
+
+    def __init__(self, ttl_segundos=TTL_PADRAO_SEGUNDOS, max_tabelas=MAX_TABELAS_PADRAO, memoria_max_mb=MEMORIA_MAX_PADRAO_MB):
+        self.ttl_segundos = ttl_segundos
+        self.max_tabelas = max_tabelas
+        self.memoria_max_bytes = memoria_max_mb * 1024 * 1024
+        self._tabelas = OrderedDict()
+        self._memoria_em_uso = 0
+        self._lock = threading.Lock()
+
+    def salvar(self, df, tamanho=None):
+        tabela_id = uuid.uuid4().hex
+        self.substituir(tabela_id, df, tamanho=tamanho)
+        return tabela_id
+
+    def substituir(self, tabela_id, df, derivados=None, tamanho=None):
+        """Guarda `df` no lugar da tabela atual.
+
+        Objetos derivados da tabela anterior (índices, cálculos) são descartados,
+        exceto os passados em `derivados`, que continuam válidos para a nova tabela.
+        `tamanho` (bytes) pode vir já medido, para não medir de novo uma tabela grande.
+        """
+        if tamanho is None: tamanho = tamanho_dataframe(df)
+        derivados = dict(derivados or {})
+        tamanho += sum(tamanho_derivado(objeto) for objeto in derivados.values())
+        if tamanho > self.memoria_max_bytes:
+            raise ValueError("A tabela é grande demais para ser guardada no servidor.")
+        with self._lock:
+            self._remover(tabela_id)
+            self._tabelas[tabela_id] = {
+                'df': df, 'tamanho': tamanho, 'derivados': derivados,
+                'expira_em': time.monotonic() + self.ttl_segundos
+            }
+            self._memoria_em_uso += tamanho
+            self._liberar_espaco()
+
+    def obter(self, tabela_id):
+        """Retorna o DataFrame guardado ou levanta KeyError se ele não existir mais."""
+        with self._lock:
+            entrada = self._tabelas.get(tabela_id)
+            if entrada is None or entrada['expira_em'] < time.monotonic():
+                self._remover(tabela_id)
+                raise KeyError(tabela_id)
+            entrada['expira_em'] = time.monotonic() + self.ttl_segundos
+            self._tabelas.move_to_end(tabela_id)
+            return entrada['df']
+
+    def obter_derivado(self, tabela_id, nome, construir=None):
+        """Retorna um objeto derivado da tabela, construído por `construir(df)` só na primeira vez.
+
+        Sem `construir`, retorna None se o objeto ainda não foi guardado.
+        """
+        df = self.obter(tabela_id)
+        with self._lock:
+            entrada = self._tabelas.get(tabela_id)
+            if entrada is not None and nome in entrada['derivados']:
+                return entrada['derivados'][nome]
+        if construir is None:
+            return None
+        derivado = construir(df)
+        self.guardar_derivado(tabela_id, nome, derivado, df)
+        return derivado
+
+    def guardar_derivado(self, tabela_id, nome, derivado, df):
+        """Guarda (ou troca) um objeto derivado de `df`.
+
+        Só guarda se a tabela não foi trocada enquanto o objeto era construído.
+        """
+        with self._lock:
+            entrada = self._tabelas.get(tabela_id)
+            if entrada is None or entrada['df'] is not df:
+                return
+            tamanho = tamanho_derivado(derivado) - tamanho_derivado(entrada['derivados'].get(nome))
+            entrada['derivados'][nome] = derivado
+            entrada['tamanho'] += tamanho
+            self._memoria_em_uso += tamanho
+            self._liberar_espaco()
+
+    def remover(self, tabela_id):
+        with self._lock:
+            self._remover(tabela_id)
+
+    def _remover(self, tabela_id):
+        entrada = self._tabelas.pop(tabela_id, None)
+        if entrada is not None:
+            self._memoria_em_uso -= entrada['tamanho']
+
+    def _liberar_espaco(self):
+        agora = time.monotonic()
+        for tabela_id in [tid for tid, entrada in self._tabelas.items() if entrada['expira_em'] < agora]:
+            self._remover(tabela_id)
+        while self._tabelas and (len(self._tabelas) > self.max_tabelas or self._memoria_em_uso > self.memoria_max_bytes):
+            self._remover(next(iter(self._tabelas)))
@@ -1,24 +1,71 @@
 # Arquivo: backend/main.py (VERSÃO FINAL COM MERGE CORRIGIDO)
 
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 import pandas as pd
-from io import StringIO, BytesIO
+from io import StringIO
 import json
-from typing import List
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Optional
 from pydantic import BaseModel
 
 from core.calculator import (
     carregar_dados_csv, 
     calcular_mensais, 
+    calcular_cenarios,
     reajustar_valores, 
-    formatar_dataframe_para_csv, 
-    merge_entradas_df
+    reajustar_em_lote,
+    gerar_csv_mensais,
+    gerar_ndjson_mensais,
+    nomes_originais_de,
+    completar_nomes_originais,
+    merge_entradas_df,
+    filtrar_lotes,
+    ALIAS_INDEX,
+    CSV_ENGINE
 )
-from models.schemas import CalculoPayload, ReajustePayload
+from core import calculator, centavos, respostas
+from core.sessoes import TabelasEmMemoria, tamanho_dataframe
+from core.indice_unidades import IndiceUnidades
+from core.execucao import ExecutorLimitado, ExecutorSobrecarregado, INLINE_MAX_LINHAS, INLINE_MAX_BYTES
+from core.respostas import para_json, serializar_tabela, escolher_formato, TIPOS_MIDIA
+from core.recalculo import calcular_incremental
+from core.consultas import IndiceCategorias, filtrar_posicoes, paginar, resumir_grupos, validar_ordenacao, validar_agrupamento
+from core.cache_resultados import CacheResultados, hash_bytes, hash_dataframe, hash_arquivos, montar_chave
+from core.centavos import ARREDONDAMENTO_PADRAO, validar_arredondamento
+from core.amortizacao import gerar_csv_amortizacao, gerar_ndjson_amortizacao, validar_sistema
+from core.metricas import RegistroMetricas, SERVER_TIMING, etapa, contar, coletar_etapas, juntar_medicoes, iniciar_medicoes, encerrar_medicoes
+from models.schemas import CalculoPayload, DownloadPayload, CalculoIncrementalPayload, CenariosPayload, ReajustePayload, ReajusteLotePayload, ConsultaPayload, ResumoPayload
 
-app = FastAPI(title="Calculadora de Lotes API")
+tabelas = TabelasEmMemoria()
+executor = ExecutorLimitado()
+# Configuração e código de que dependem os resultados guardados (aliases, leitor do CSV, cálculo e serialização).
+VERSAO_CACHE = montar_chave(
+    sorted(ALIAS_INDEX.items()), CSV_ENGINE, pd.__version__,
+    hash_arquivos(__file__, calculator.__file__, centavos.__file__, respostas.__file__)
+)
+cache = CacheResultados(versao=VERSAO_CACHE)
+metricas = RegistroMetricas()
+# Objetos derivados guardados junto com cada tabela.
+INDICES_UNIDADES = ['indice_unidade', 'indice_bloco_unidade']
+INDICE_CATEGORIAS = 'indice_categorias'
+CALCULO_INCREMENTAL = 'calculo_incremental'
+# Hash do conteúdo para o cache de resultados; nunca é mantido numa substituição.
+HASH_CONTEUDO = 'hash_conteudo'
+# Formatos do /api/download_csv (o corpo é gerado em blocos, sem montar a tabela inteira).
+FORMATOS_DOWNLOAD = {'csv': 'text/csv', 'ndjson': TIPOS_MIDIA['ndjson']}
+# Derivados que deixam de valer quando a coluna muda (o cálculo incremental compara os valores sozinho).
+DERIVADOS_POR_COLUNA = {'UNIDADE': INDICES_UNIDADES, 'BLOCO': INDICES_UNIDADES + [INDICE_CATEGORIAS], 'ETAPA': [INDICE_CATEGORIAS]}
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    yield
+    executor.encerrar()
+
+app = FastAPI(title="Calculadora de Lotes API", lifespan=ciclo_de_vida)
 
 origins = [
     "http://localhost:3000",
@@ -35,77 +82,480 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Tabela-Id", "X-Nomes-Originais", "X-Merge-Relatorio", "X-Reajuste-Regras", "X-Total-Linhas", "X-Pagina", "X-Total-Paginas", "Server-Timing"],
 )
 
+@app.exception_handler(ExecutorSobrecarregado)
+async def handle_sobrecarga(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.middleware("http")
+async def medir_requisicao(request, call_next):
+    """Latência e etapas de cada requisição; registradas quando o corpo termina de ser enviado."""
+    inicio = time.perf_counter()
+    medicoes, token = iniciar_medicoes()
+    try:
+        response = await call_next(request)
+    finally:
+        encerrar_medicoes(token)
+    # Só as rotas conhecidas viram rótulo, para não criar uma série por URL inválida
+    rota = request.url.path if 'endpoint' in request.scope else 'desconhecida'
+    if SERVER_TIMING and medicoes.etapas:
+        # Num download em streaming, as etapas de cada bloco só aparecem no /metrics
+        response.headers["Server-Timing"] = medicoes.server_timing()
+    corpo = response.body_iterator
+
+    async def corpo_medido():
+        try:
+            async for parte in corpo:
+                yield parte
+        finally:
+            metricas.registrar(rota, request.method, response.status_code, time.perf_counter() - inicio, medicoes)
+    response.body_iterator = corpo_medido()
+    return response
+
+async def executar(funcao, *args, inline=False):
+    """Roda `funcao` no executor e junta as etapas medidas lá às da requisição."""
+    resultado, medicoes = await executor.executar(coletar_etapas, funcao, *args, inline=inline)
+    juntar_medicoes(medicoes)
+    return resultado
+
+def resposta_json(corpo, headers=None, formato='registros'):
+    return Response(content=corpo, media_type=TIPOS_MIDIA[formato], headers=headers)
+
+def obter_formato(formato, accept):
+    """Formato da tabela na resposta (parâmetro `formato` ou cabeçalho Accept); padrão: registros."""
+    try:
+        return escolher_formato(formato, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def obter_arredondamento(arredondamento):
+    """Regra do modo exato em centavos (pedida ou a padrão do servidor); None mantém o cálculo em float."""
+    try:
+        return validar_arredondamento(arredondamento or ARREDONDAMENTO_PADRAO)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def obter_sistema(sistema):
+    try:
+        return validar_sistema(sistema) if sistema else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def obter_formato_download(formato):
+    if formato not in FORMATOS_DOWNLOAD:
+        raise HTTPException(status_code=400, detail=f"Formato de download inválido: '{formato}'. Use um destes: {', '.join(FORMATOS_DOWNLOAD)}.")
+    return formato
+
+def obter_tabela(tabela_id):
+    try:
+        return tabelas.obter(tabela_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Tabela não encontrada ou expirada. Envie o arquivo novamente.")
+
+def derivados_mantidos(tabela_id, nomes):
+    """Derivados da tabela atual que continuam válidos depois de uma alteração."""
+    derivados = {nome: tabelas.obter_derivado(tabela_id, nome) for nome in nomes}
+    return {nome: derivado for nome, derivado in derivados.items() if derivado is not None}
+
+def obter_ordenacao(df_lotes, ordenar_por):
+    try:
+        return validar_ordenacao(df_lotes, ordenar_por)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def obter_agrupamento(agrupar_por):
+    try:
+        return validar_agrupamento(agrupar_por)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def executar_com_indice(tabela_id, df_lotes, funcao, *args, inline=False):
+    """Roda `funcao(df_lotes, indice, *args)` no executor; o índice de categorias, se ainda não existe, é montado lá e guardado."""
+    indice = tabelas.obter_derivado(tabela_id, INDICE_CATEGORIAS)
+    indice_novo, resultado = await executar(com_indice_categorias, funcao, df_lotes, indice, *args, inline=inline)
+    if indice_novo is not None:
+        tabelas.guardar_derivado(tabela_id, INDICE_CATEGORIAS, indice_novo, df_lotes)
+    return resultado
+
+async def hash_lotes(payload, df_lotes):
+    """Hash do conteúdo dos lotes do cálculo, calculado no executor; o de uma tabela guardada é calculado uma vez e fica junto dela."""
+    if not payload.tabela_id:
+        return await executar(hash_dataframe, df_lotes, inline=len(df_lotes) <= INLINE_MAX_LINHAS)
+    hash_tabela = tabelas.obter_derivado(payload.tabela_id, HASH_CONTEUDO)
+    if hash_tabela is None:
+        df_tabela = obter_tabela(payload.tabela_id)
+        hash_tabela = await executar(hash_dataframe, df_tabela, inline=len(df_tabela) <= INLINE_MAX_LINHAS)
+        tabelas.guardar_derivado(payload.tabela_id, HASH_CONTEUDO, hash_tabela, df_tabela)
+    filtros = payload.filtros.dict() if payload.filtros else None
+    return montar_chave(hash_tabela, json.dumps(filtros, sort_keys=True))
+
+async def ler_cache(chave):
+    """Sem diretório o cache fica só na memória e responde direto; com ele, a leitura (que pode ir ao disco) roda numa thread."""
+    if not cache.diretorio:
+        return cache.obter(chave)
+    return await asyncio.to_thread(cache.obter, chave)
+
+async def gravar_cache(chave, valor):
+    """Como em ler_cache: o transbordo para o disco (pickle) não roda no event loop."""
+    if not cache.diretorio:
+        return cache.guardar(chave, valor)
+    await asyncio.to_thread(cache.guardar, chave, valor)
+
+async def obter_df_lotes(payload):
+    """Monta o DataFrame de lotes a partir do ID da tabela guardada ou da lista enviada."""
+    if payload.tabela_id:
+        df_lotes = obter_tabela(payload.tabela_id)
+    elif payload.lotes is not None:
+        df_lotes = pd.DataFrame([lote.dict() for lote in payload.lotes])
+        if getattr(payload, 'nomes_originais', None):
+            df_lotes.attrs['nomes_originais'] = completar_nomes_originais(payload.nomes_originais)
+    else:
+        raise HTTPException(status_code=400, detail="Informe 'tabela_id' ou a lista de 'lotes'.")
+    if payload.filtros and payload.tabela_id:
+        # Tabelas guardadas filtram ETAPA/BLOCO pelo índice de categorias
+        posicoes = await executar_com_indice(payload.tabela_id, df_lotes, filtrar_posicoes_de, payload.filtros.dict(), inline=len(df_lotes) <= INLINE_MAX_LINHAS)
+        df_lotes = df_lotes if len(posicoes) == len(df_lotes) else df_lotes.iloc[posicoes]
+    elif payload.filtros:
+        df_lotes = filtrar_lotes(df_lotes, **payload.filtros.dict())
+    return df_lotes
+
+# --- TRABALHO PESADO (roda no pool do executor; no modo 'processo', em outro processo) ---
+def com_indice_categorias(funcao, df_lotes, indice, *args):
+    """Retorna (índice montado aqui ou None, resultado de funcao)."""
+    indice_novo = IndiceCategorias(df_lotes) if indice is None else None
+    return indice_novo, funcao(df_lotes, indice or indice_novo, *args)
+
+def filtrar_posicoes_de(df_lotes, indice, filtros):
+    return filtrar_posicoes(df_lotes, indice, **filtros)
+
+def ler_planilha(conteudo, formato):
+    with etapa('decodificacao'):
+        texto = conteudo.decode('utf-8')
+    df = carregar_dados_csv(StringIO(texto))
+    return df, tamanho_dataframe(df), serializar_tabela(df, formato)
+
+def reajustar(df_lotes, df_tabela, coluna_alvo, operacao, tipo_reajuste, valor_reajuste, formato, arredondamento=None):
+    """Calcula o preview; com `df_tabela`, devolve também a tabela com os novos valores aplicados."""
+    with etapa('reajuste'):
+        df_preview = reajustar_valores(df_lotes, coluna_alvo, operacao, tipo_reajuste, valor_reajuste, arredondamento)
+    contar('reajuste', linhas=len(df_lotes))
+    df_atualizado, tamanho = None, None
+    if df_tabela is not None:
+        with etapa('aplicacao'):
+            df_atualizado = df_tabela.copy()
+            df_atualizado.loc[df_preview.index, coluna_alvo] = df_preview['NOVO_VALOR']
+            tamanho = tamanho_dataframe(df_atualizado)
+    return df_atualizado, tamanho, serializar_tabela(df_preview, formato)
+
+def reajustar_com_regras(df_lotes, df_tabela, regras, formato, arredondamento=None):
+    """Como `reajustar`, para uma lista de regras; devolve também o resumo por regra."""
+    with etapa('reajuste'):
+        df_preview, resumo = reajustar_em_lote(df_lotes, regras, arredondamento)
+    contar('reajuste', linhas=len(df_lotes))
+    df_atualizado, tamanho = None, None
+    if df_tabela is not None:
+        with etapa('aplicacao'):
+            df_atualizado = df_tabela.copy()
+            for coluna in {regra['coluna_alvo'] for regra in regras}:
+                df_atualizado.loc[df_preview.index, coluna] = df_preview[f'{coluna}_NOVO']
+            tamanho = tamanho_dataframe(df_atualizado)
+    return df_atualizado, tamanho, resumo, serializar_tabela(df_preview, formato)
+
+def calcular(df_lotes, prazo_anos, taxa_juros_anual, formato, arredondamento=None):
+    with etapa('calculo_mensais'):
+        df_calculado = calcular_mensais(df_lotes, prazo_anos, taxa_juros_anual, arredondamento)
+    contar('calculo_mensais', linhas=len(df_lotes))
+    return serializar_tabela(df_calculado, formato)
+
+def calcular_diff(df_lotes, estado, prazo_anos, taxa_juros_anual, arredondamento=None, versao=None):
+    estado, diff = calcular_incremental(df_lotes, estado, prazo_anos, taxa_juros_anual, arredondamento, versao)
+    return estado, para_json(diff)
+
+def consultar_pagina(df_lotes, indice, filtros, ordenar_por, decrescente, pagina, tamanho_pagina, prazo_anos, taxa_juros_anual, formato, arredondamento=None):
+    df_pagina, total = paginar(df_lotes, indice, filtros, ordenar_por, decrescente, pagina, tamanho_pagina)
+    if prazo_anos is not None and taxa_juros_anual is not None:
+        df_pagina = calcular_mensais(df_pagina, prazo_anos, taxa_juros_anual, arredondamento)
+    return total, serializar_tabela(df_pagina, formato)
+
+def calcular_varios_cenarios(df_lotes, cenarios, incluir_tabelas, arredondamento=None):
+    resultados = calcular_cenarios(df_lotes, cenarios, incluir_tabelas=incluir_tabelas, arredondamento=arredondamento)
+    for resultado in resultados:
+        if 'tabela' in resultado:
+            resultado['lotes'] = resultado.pop('tabela').to_dict(orient='records')
+    return para_json(resultados)
+
+def combinar_entradas(df_principal, lotes_atuais, conteudo, indice, usar_bloco, formato, nomes_originais=None):
+    if df_principal is None:
+        # Converte o JSON dos lotes atuais de volta para um DataFrame
+        df_principal = pd.DataFrame(json.loads(lotes_atuais))
+        if nomes_originais: df_principal.attrs['nomes_originais'] = completar_nomes_originais(json.loads(nomes_originais))
+    elif indice is None:
+        # Tabela guardada no servidor: o índice é montado uma vez e guardado junto com ela
+        indice = IndiceUnidades(df_principal, usar_bloco=usar_bloco)
+    with etapa('decodificacao'):
+        texto = conteudo.decode('utf-8')
+    df_merged, relatorio = merge_entradas_df(df_principal, StringIO(texto), indice=indice, usar_bloco=usar_bloco)
+    return df_merged, tamanho_dataframe(df_merged), relatorio, indice, serializar_tabela(df_merged, formato)
+
 @app.get("/")
 def read_root():
     return {"Status": "API da Calculadora de Lotes está online!"}
 
+@app.get("/metrics")
+def handle_metrics():
+    """Métricas no formato texto do Prometheus: latência por rota e etapa, linhas/bytes, cache e executor."""
+    estatisticas = cache.estatisticas()
+    extras = [
+        ('calculadora_cache_acertos_total', 'counter', 'Acertos do cache de resultados.',
+         [((('nivel', 'memoria'),), estatisticas['acertos_memoria']), ((('nivel', 'disco'),), estatisticas['acertos_disco'])]),
+        ('calculadora_cache_faltas_total', 'counter', 'Faltas do cache de resultados.', [((), estatisticas['faltas'])]),
+        ('calculadora_cache_remocoes_total', 'counter', 'Entradas removidas do cache por falta de espaço.',
+         [((('nivel', 'memoria'),), estatisticas['remocoes_memoria']), ((('nivel', 'disco'),), estatisticas['remocoes_disco'])]),
+        ('calculadora_cache_bytes', 'gauge', 'Bytes ocupados pelo cache de resultados.',
+         [((('nivel', 'memoria'),), estatisticas['bytes_memoria']), ((('nivel', 'disco'),), estatisticas['bytes_disco'])]),
+        ('calculadora_executor_pendentes', 'gauge', 'Tarefas no pool do executor (rodando ou na fila).', [((), executor.pendentes)]),
+        ('calculadora_executor_workers', 'gauge', 'Workers do pool do executor.', [((), executor.workers)]),
+    ]
+    return PlainTextResponse(metricas.exportar(extras), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/api/cache")
+def handle_cache():
+    """Acertos, faltas e ocupação do cache de resultados."""
+    return cache.estatisticas()
+
 @app.post("/api/upload")
-async def handle_upload(file: UploadFile = File(...)):
+async def handle_upload(file: UploadFile = File(...), formato: Optional[str] = None, accept: Optional[str] = Header(None)):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Tipo de arquivo inválido. Por favor, envie um .csv")
+    formato = obter_formato(formato, accept)
     try:
-        contents = await file.read()
-        string_io = StringIO(contents.decode('utf-8'))
-        df = carregar_dados_csv(string_io)
-        return df.to_dict(orient='records')
+        with etapa('leitura_arquivo'):
+            contents = await file.read()
+        contar('leitura_arquivo', tamanho_bytes=len(contents))
+        inline = len(contents) <= INLINE_MAX_BYTES
+        with etapa('cache'):
+            chave = montar_chave('upload', await executar(hash_bytes, contents, inline=inline), formato)
+            resultado = await ler_cache(chave)
+        if resultado is None:
+            resultado = await executar(ler_planilha, contents, formato, inline=inline)
+            await gravar_cache(chave, resultado)
+        # A mesma planilha enviada de novo ganha outro ID, mas reaproveita a tabela (que não é alterada no lugar)
+        df, tamanho, corpo = resultado
+        headers = {"X-Nomes-Originais": json.dumps(df.attrs['nomes_originais'])}
+        try:
+            headers["X-Tabela-Id"] = tabelas.salvar(df, tamanho=tamanho)
+        except ValueError:
+            # Guardar no servidor é opcional: sem X-Tabela-Id, o cliente continua enviando os lotes
+            pass
+        return resposta_json(corpo, formato=formato, headers=headers)
+    except ExecutorSobrecarregado:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao processar o arquivo: {str(e)}")
 
 @app.post("/api/reajustar")
-async def handle_reajuste_preview(payload: ReajustePayload):
+async def handle_reajuste_preview(payload: ReajustePayload, formato: Optional[str] = None, accept: Optional[str] = Header(None)):
+    formato = obter_formato(formato, accept)
+    arredondamento = obter_arredondamento(payload.arredondamento)
+    df_lotes = await obter_df_lotes(payload)
+    df_tabela = obter_tabela(payload.tabela_id) if payload.aplicar and payload.tabela_id else None
     try:
-        df_lotes = pd.DataFrame([lote.dict() for lote in payload.lotes])
-        df_preview = reajustar_valores(df_lotes, payload.coluna_alvo, payload.operacao, payload.tipo_reajuste, payload.valor_reajuste)
-        return df_preview.to_dict(orient='records')
+        df_atualizado, tamanho, corpo = await executar(
+            reajustar, df_lotes, df_tabela, payload.coluna_alvo, payload.operacao, payload.tipo_reajuste, payload.valor_reajuste, formato, arredondamento,
+            inline=len(df_lotes) <= INLINE_MAX_LINHAS and (df_tabela is None or len(df_tabela) <= INLINE_MAX_LINHAS)
+        )
+        if df_atualizado is not None:
+            invalidos = DERIVADOS_POR_COLUNA.get(payload.coluna_alvo, [])
+            nomes = [nome for nome in INDICES_UNIDADES + [INDICE_CATEGORIAS, CALCULO_INCREMENTAL] if nome not in invalidos]
+            tabelas.substituir(payload.tabela_id, df_atualizado, derivados=derivados_mantidos(payload.tabela_id, nomes), tamanho=tamanho)
+        return resposta_json(corpo, formato=formato)
+    except ExecutorSobrecarregado:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro durante o reajuste: {str(e)}")
+
+@app.post("/api/reajustar_lote")
+async def handle_reajuste_lote(payload: ReajusteLotePayload, formato: Optional[str] = None, accept: Optional[str] = Header(None)):
+    """Várias regras de reajuste numa requisição: preview dos lotes alterados e resumo por regra no cabeçalho."""
+    formato = obter_formato(formato, accept)
+    arredondamento = obter_arredondamento(payload.arredondamento)
+    df_lotes = await obter_df_lotes(payload)
+    df_tabela = obter_tabela(payload.tabela_id) if payload.aplicar and payload.tabela_id else None
+    try:
+        regras = [regra.dict() for regra in payload.regras]
+        df_atualizado, tamanho, resumo, corpo = await executar(
+            reajustar_com_regras, df_lotes, df_tabela, regras, formato, arredondamento,
+            inline=len(df_lotes) <= INLINE_MAX_LINHAS and (df_tabela is None or len(df_tabela) <= INLINE_MAX_LINHAS)
+        )
+        if df_atualizado is not None:
+            invalidos = {nome for regra in regras for nome in DERIVADOS_POR_COLUNA.get(regra['coluna_alvo'], [])}
+            nomes = [nome for nome in INDICES_UNIDADES + [INDICE_CATEGORIAS, CALCULO_INCREMENTAL] if nome not in invalidos]
+            tabelas.substituir(payload.tabela_id, df_atualizado, derivados=derivados_mantidos(payload.tabela_id, nomes), tamanho=tamanho)
+        return resposta_json(corpo, formato=formato, headers={"X-Reajuste-Regras": json.dumps(resumo)})
+    except ExecutorSobrecarregado:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro durante o reajuste: {str(e)}")
 
 @app.post("/api/calcular")
-async def handle_calculo(payload: CalculoPayload):
+async def handle_calculo(payload: CalculoPayload, formato: Optional[str] = None, accept: Optional[str] = Header(None)):
+    formato = obter_formato(formato, accept)
+    arredondamento = obter_arredondamento(payload.arredondamento)
+    df_lotes = await obter_df_lotes(payload)
     try:
-        df_lotes = pd.DataFrame([lote.dict() for lote in payload.lotes])
-        df_resultado = calcular_mensais(df_lotes, payload.prazo_anos, payload.taxa_juros_anual)
-        return df_resultado.to_dict(orient='records')
+        with etapa('cache'):
+            chave = montar_chave('calcular', await hash_lotes(payload, df_lotes), payload.prazo_anos, payload.taxa_juros_anual, formato, arredondamento)
+            corpo = await ler_cache(chave)
+        if corpo is None:
+            corpo = await executar(calcular, df_lotes, payload.prazo_anos, payload.taxa_juros_anual, formato, arredondamento, inline=len(df_lotes) <= INLINE_MAX_LINHAS)
+            await gravar_cache(chave, corpo)
+        return resposta_json(corpo, formato=formato)
+    except ExecutorSobrecarregado:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro durante o cálculo: {str(e)}")
+
+@app.post("/api/calcular_cenarios")
+async def handle_calculo_cenarios(payload: CenariosPayload):
+    arredondamento = obter_arredondamento(payload.arredondamento)
+    df_lotes = await obter_df_lotes(payload)
+    try:
+        cenarios = [(cenario.prazo_anos, cenario.taxa_juros_anual) for cenario in payload.cenarios]
+        corpo = await executar(
+            calcular_varios_cenarios, df_lotes, cenarios, payload.incluir_tabelas, arredondamento,
+            inline=len(df_lotes) * len(cenarios) <= INLINE_MAX_LINHAS
+        )
+        return resposta_json(corpo)
+    except ExecutorSobrecarregado:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro durante o cálculo dos cenários: {str(e)}")
+
+@app.post("/api/calcular_incremental")
+async def handle_calculo_incremental(payload: CalculoIncrementalPayload):
+    """Recalcula a tabela guardada e devolve só o que mudou desde o último cálculo dela."""
+    arredondamento = obter_arredondamento(payload.arredondamento)
+    df_lotes = obter_tabela(payload.tabela_id)
+    estado = tabelas.obter_derivado(payload.tabela_id, CALCULO_INCREMENTAL)
+    try:
+        estado, corpo = await executar(
+            calcular_diff, df_lotes, estado, payload.prazo_anos, payload.taxa_juros_anual, arredondamento, payload.versao,
+            inline=len(df_lotes) <= INLINE_MAX_LINHAS
+        )
+        tabelas.guardar_derivado(payload.tabela_id, CALCULO_INCREMENTAL, estado, df_lotes)
+        return resposta_json(corpo)
+    except ExecutorSobrecarregado:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro durante o cálculo: {str(e)}")
 
+@app.post("/api/consultar")
+async def handle_consulta(payload: ConsultaPayload, formato: Optional[str] = None, accept: Optional[str] = Header(None)):
+    """Uma página da tabela guardada, filtrada e ordenada no servidor; os totais vão nos cabeçalhos."""
+    formato = obter_formato(formato, accept)
+    arredondamento = obter_arredondamento(payload.arredondamento)
+    df_lotes = obter_tabela(payload.tabela_id)
+    obter_ordenacao(df_lotes, payload.ordenar_por)
+    try:
+        total, corpo = await executar_com_indice(
+            payload.tabela_id, df_lotes, consultar_pagina, payload.filtros.dict() if payload.filtros else None,
+            payload.ordenar_por, payload.decrescente, payload.pagina, payload.tamanho_pagina,
+            payload.prazo_anos, payload.taxa_juros_anual, formato, arredondamento,
+            inline=len(df_lotes) <= INLINE_MAX_LINHAS
+        )
+        return resposta_json(corpo, formato=formato, headers={
+            "X-Total-Linhas": str(total),
+            "X-Pagina": str(payload.pagina),
+            "X-Total-Paginas": str(-(-total // payload.tamanho_pagina)),
+        })
+    except ExecutorSobrecarregado:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na consulta: {str(e)}")
+
+@app.post("/api/resumo")
+async def handle_resumo(payload: ResumoPayload):
+    """Quantidade de lotes, total à vista e mensal média do ano 1 por ETAPA/BLOCO."""
+    arredondamento = obter_arredondamento(payload.arredondamento)
+    agrupar_por = obter_agrupamento(payload.agrupar_por)
+    df_lotes = obter_tabela(payload.tabela_id)
+    try:
+        resumo = await executar_com_indice(
+            payload.tabela_id, df_lotes, resumir_grupos, agrupar_por,
+            payload.filtros.dict() if payload.filtros else None, payload.prazo_anos, arredondamento,
+            inline=len(df_lotes) <= INLINE_MAX_LINHAS
+        )
+        return resumo
+    except ExecutorSobrecarregado:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao resumir a tabela: {str(e)}")
+
 @app.post("/api/download_csv")
-async def handle_download(payload: CalculoPayload):
+async def handle_download(payload: DownloadPayload, formato: str = 'csv'):
+    """Mensais por ano (padrão) ou, com `sistema` ('price'/'sac'), a tabela de amortização mês a mês; em CSV ou NDJSON."""
+    formato = obter_formato_download(formato)
+    sistema = obter_sistema(payload.sistema)
+    arredondamento = obter_arredondamento(payload.arredondamento)
+    df_lotes = await obter_df_lotes(payload)
     try:
-        df_lotes = pd.DataFrame([lote.dict() for lote in payload.lotes])
-        df_resultado = calcular_mensais(df_lotes, payload.prazo_anos, payload.taxa_juros_anual)
-        df_formatado = formatar_dataframe_para_csv(df_resultado)
-        
-        stream = BytesIO()
-        df_formatado.to_csv(stream, index=False, sep=';', encoding='utf-8-sig')
-        stream.seek(0)
-        
-        response = StreamingResponse(stream, media_type="text/csv")
-        response.headers["Content-Disposition"] = f"attachment; filename=precificacao_calculada_{payload.prazo_anos}anos_{payload.taxa_juros_anual}juros.csv"
+        if sistema:
+            if formato == 'csv':
+                blocos = gerar_csv_amortizacao(df_lotes, payload.prazo_anos, payload.taxa_juros_anual, sistema, nomes_originais_de(df_lotes), arredondamento=arredondamento)
+            else:
+                blocos = gerar_ndjson_amortizacao(df_lotes, payload.prazo_anos, payload.taxa_juros_anual, sistema, arredondamento=arredondamento)
+            nome_arquivo = f"amortizacao_{sistema}_{payload.prazo_anos}anos_{payload.taxa_juros_anual}juros.{formato}"
+        else:
+            if formato == 'csv':
+                blocos = gerar_csv_mensais(df_lotes, payload.prazo_anos, payload.taxa_juros_anual, arredondamento=arredondamento)
+            else:
+                blocos = gerar_ndjson_mensais(df_lotes, payload.prazo_anos, payload.taxa_juros_anual, arredondamento=arredondamento)
+            nome_arquivo = f"precificacao_calculada_{payload.prazo_anos}anos_{payload.taxa_juros_anual}juros.{formato}"
+        response = StreamingResponse(blocos, media_type=FORMATOS_DOWNLOAD[formato])
+        response.headers["Content-Disposition"] = f"attachment; filename={nome_arquivo}"
         return response
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar o CSV: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar o {formato.upper()}: {str(e)}")
         
 # --- ROTA DE MERGE CORRIGIDA ---
 @app.post("/api/merge_entradas")
 async def handle_merge(
-    lotes_atuais: str = Form(...),
-    file: UploadFile = File(...)
+    lotes_atuais: Optional[str] = Form(None),
+    tabela_id: Optional[str] = Form(None),
+    usar_bloco: bool = Form(False),
+    # Cabeçalhos originais (JSON, como no X-Nomes-Originais do upload) dos lotes_atuais
+    nomes_originais: Optional[str] = Form(None),
+    file: UploadFile = File(...),
+    formato: Optional[str] = None,
+    accept: Optional[str] = Header(None)
 ):
+    formato = obter_formato(formato, accept)
+    df_principal, indice = None, None
+    if tabela_id:
+        df_principal = obter_tabela(tabela_id)
+        nome_indice = 'indice_bloco_unidade' if usar_bloco else 'indice_unidade'
+        # Em tabelas guardadas no servidor, o índice de unidades é montado uma vez só
+        indice = tabelas.obter_derivado(tabela_id, nome_indice)
+    elif lotes_atuais is None:
+        raise HTTPException(status_code=400, detail="Informe 'tabela_id' ou 'lotes_atuais'.")
     try:
-        # Converte o JSON dos lotes atuais de volta para um DataFrame
-        lotes_list = json.loads(lotes_atuais)
-        df_principal = pd.DataFrame(lotes_list)
-
-        # Processa o novo arquivo CSV das entradas em um stream
-        contents = await file.read()
-        df_entradas_stream = StringIO(contents.decode('utf-8'))
-
-        # Chama a nossa função de merge, passando os dois DataFrames
-        df_merged = merge_entradas_df(df_principal, df_entradas_stream)
-        
-        return df_merged.to_dict(orient='records')
+        # Processa o novo arquivo CSV das entradas junto com o merge, fora do event loop
+        with etapa('leitura_arquivo'):
+            contents = await file.read()
+        contar('leitura_arquivo', tamanho_bytes=len(contents))
+        leve = len(contents) <= INLINE_MAX_BYTES and (len(df_principal) <= INLINE_MAX_LINHAS if tabela_id else len(lotes_atuais) <= INLINE_MAX_BYTES)
+        df_merged, tamanho, relatorio, indice, corpo = await executar(combinar_entradas, df_principal, lotes_atuais, contents, indice, usar_bloco, formato, nomes_originais, inline=leve)
+        if tabela_id:
+            # O merge não muda UNIDADE/BLOCO nem a ordem das linhas: o índice continua valendo
+            derivados = {**derivados_mantidos(tabela_id, INDICES_UNIDADES + [INDICE_CATEGORIAS, CALCULO_INCREMENTAL]), nome_indice: indice}
+            tabelas.substituir(tabela_id, df_merged, derivados=derivados, tamanho=tamanho)
+        return resposta_json(corpo, formato=formato, headers={
+            "X-Merge-Relatorio": json.dumps(relatorio),
+            "X-Nomes-Originais": json.dumps(nomes_originais_de(df_merged)),
+        })
+    except ExecutorSobrecarregado:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao combinar planilhas: {str(e)}")
\ No newline at end of file
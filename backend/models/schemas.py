@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 
 class Lote(BaseModel):
     ETAPA: Optional[str] = None
@@ -8,14 +8,92 @@ class Lote(BaseModel):
     VALOR_A_VISTA: float
     ENTRADA: float
 
+class FiltroLotes(BaseModel):
+    etapas: Optional[List[str]] = None
+    blocos: Optional[List[str]] = None
+    unidades: Optional[List[str]] = None
+
 class CalculoPayload(BaseModel):
-    lotes: List[Lote]
+    lotes: Optional[List[Lote]] = None
+    tabela_id: Optional[str] = None
+    filtros: Optional[FiltroLotes] = None
+    nomes_originais: Optional[Dict[str, str]] = None
+    prazo_anos: int
+    taxa_juros_anual: float
+    # Modo exato em centavos: 'half_even' ou 'half_up'. Sem valor, usa o padrão do servidor (float64 se não houver).
+    arredondamento: Optional[str] = None
+
+class DownloadPayload(CalculoPayload):
+    # 'price' ou 'sac': baixa a tabela de amortização mês a mês em vez das mensais por ano.
+    sistema: Optional[str] = None
+
+class CalculoIncrementalPayload(BaseModel):
+    tabela_id: str
+    prazo_anos: int
+    taxa_juros_anual: float
+    arredondamento: Optional[str] = None
+    # Versão (devolvida no diff anterior) da tabela que o cliente tem; sem ela o diff vem completo
+    versao: Optional[str] = None
+
+class ConsultaPayload(BaseModel):
+    tabela_id: str
+    filtros: Optional[FiltroLotes] = None
+    ordenar_por: Optional[str] = None
+    decrescente: bool = False
+    pagina: int = Field(1, ge=1)
+    tamanho_pagina: int = Field(100, ge=1, le=5000)
+    # Com prazo e taxa, as linhas da página já vêm com as mensais calculadas.
+    prazo_anos: Optional[int] = None
+    taxa_juros_anual: Optional[float] = None
+    arredondamento: Optional[str] = None
+
+class ResumoPayload(BaseModel):
+    tabela_id: str
+    filtros: Optional[FiltroLotes] = None
+    agrupar_por: List[str] = ['ETAPA', 'BLOCO']
+    prazo_anos: Optional[int] = None
+    arredondamento: Optional[str] = None
+
+class Cenario(BaseModel):
     prazo_anos: int
     taxa_juros_anual: float
 
+class CenariosPayload(BaseModel):
+    lotes: Optional[List[Lote]] = None
+    tabela_id: Optional[str] = None
+    filtros: Optional[FiltroLotes] = None
+    cenarios: List[Cenario]
+    incluir_tabelas: bool = False
+    arredondamento: Optional[str] = None
+
+class RegraReajuste(BaseModel):
+    coluna_alvo: str
+    operacao: str
+    tipo_reajuste: str
+    valor_reajuste: float
+    # Filtros da regra; valor_minimo/valor_maximo (inclusivos) comparam coluna_valor
+    etapas: Optional[List[str]] = None
+    blocos: Optional[List[str]] = None
+    unidades: Optional[List[str]] = None
+    valor_minimo: Optional[float] = None
+    valor_maximo: Optional[float] = None
+    coluna_valor: str = 'VALOR_A_VISTA'
+
+class ReajusteLotePayload(BaseModel):
+    lotes: Optional[List[Lote]] = None
+    tabela_id: Optional[str] = None
+    filtros: Optional[FiltroLotes] = None
+    regras: List[RegraReajuste]
+    aplicar: bool = False
+    arredondamento: Optional[str] = None
+
 class ReajustePayload(BaseModel):
-    lotes: List[Lote]
+    lotes: Optional[List[Lote]] = None
+    tabela_id: Optional[str] = None
+    filtros: Optional[FiltroLotes] = None
     coluna_alvo: str
     operacao: str
     tipo_reajuste: str
-    valor_reajuste: float
\ No newline at end of file
+    valor_reajuste: float
+    aplicar: bool = False
+    arredondamento: Optional[str] = None
\ No newline at end of file
@@ -15,6 +15,8 @@ import { uploadLotesCSV, previewReajuste, calcularSimulacao, downloadCSV, mergeE
 import './App.css';
 
 const formatarMoedaBRL = (valor) => { if (typeof valor !== 'number') return ""; return valor.toLocaleString('pt-BR', { style: 'currency', currency: 'BRL' }); };
+// Cabeçalhos originais da planilha (X-Nomes-Originais), devolvidos no download para o CSV manter os nomes
+const lerNomesOriginais = (response) => { const cabecalho = response?.headers?.['x-nomes-originais']; if (!cabecalho) return null; try { return JSON.parse(cabecalho); } catch { return null; } };
 
 function App() {
   const theme = useTheme();
@@ -37,7 +39,8 @@ function App() {
     searchTerm: '',
     etapaFiltro: 'Todas',
     blocoFiltro: 'Todas',
-    temColunaEntrada: true
+    temColunaEntrada: true,
+    nomesOriginais: null
   };
 
   const [prazoAnos, setPrazoAnos] = useState(initialState.prazoAnos);
@@ -59,6 +62,7 @@ function App() {
   const [etapaFiltro, setEtapaFiltro] = useState(initialState.etapaFiltro);
   const [blocoFiltro, setBlocoFiltro] = useState(initialState.blocoFiltro);
   const [temColunaEntrada, setTemColunaEntrada] = useState(initialState.temColunaEntrada);
+  const [nomesOriginais, setNomesOriginais] = useState(initialState.nomesOriginais);
 
   const temColunaEtapa = useMemo(() => lotes.length > 0 && lotes[0]?.hasOwnProperty('ETAPA'), [lotes]);
   const etapasUnicas = useMemo(() => temColunaEtapa ? ['Todas', ...new Set(lotes.map(lote => lote.ETAPA))] : [], [lotes, temColunaEtapa]);
@@ -80,6 +84,7 @@ function App() {
 
       const data = response.data;
       setLotes(data);
+      setNomesOriginais(lerNomesOriginais(response));
       
       if (data.length > 0) {
         const semEntradas = data.every(l => !l.ENTRADA || l.ENTRADA === 0 || l.ENTRADA === "0,00" || l.ENTRADA === "R$ 0,00");
@@ -99,6 +104,7 @@ function App() {
       const errorMessage = err.response?.data?.detail || err.message || "Erro desconhecido.";
       setError(errorMessage);
       setLotes([]);
+      setNomesOriginais(null);
       toast.error(`Erro: ${errorMessage}`, { id: loadingToast });
     } finally {
       setIsLoading(false);
@@ -142,10 +148,10 @@ function App() {
       setIsLoading(false);
     }
   };
-  const handleDownload = async () => { if (!resultadoData) { toast.error("Gere a simulação primeiro."); return; } const loadingToast = toast.loading('Gerando seu arquivo CSV...'); const lotesOriginaisNoResultado = resultadoData.map(({ ETAPA, BLOCO, UNIDADE, VALOR_A_VISTA, ENTRADA }) => ({ ETAPA, BLOCO, UNIDADE, VALOR_A_VISTA, ENTRADA })); const payload = { lotes: lotesOriginaisNoResultado, prazo_anos: prazoAnos, taxa_juros_anual: taxaJuros }; try { const response = await downloadCSV(payload); const url = window.URL.createObjectURL(new Blob([response.data])); const link = document.createElement('a'); link.href = url; const filename = `precificacao_calculada_${prazoAnos}anos_${taxaJuros}juros.csv`; link.setAttribute('download', filename); document.body.appendChild(link); link.click(); link.parentNode.removeChild(link); window.URL.revokeObjectURL(url); toast.success('Download iniciado!', { id: loadingToast }); } catch (err) { toast.error("Falha ao gerar o arquivo para download.", { id: loadingToast }); } };
+  const handleDownload = async () => { if (!resultadoData) { toast.error("Gere a simulação primeiro."); return; } const loadingToast = toast.loading('Gerando seu arquivo CSV...'); const lotesOriginaisNoResultado = resultadoData.map(({ ETAPA, BLOCO, UNIDADE, VALOR_A_VISTA, ENTRADA }) => ({ ETAPA, BLOCO, UNIDADE, VALOR_A_VISTA, ENTRADA })); const payload = { lotes: lotesOriginaisNoResultado, nomes_originais: nomesOriginais, prazo_anos: prazoAnos, taxa_juros_anual: taxaJuros }; try { const response = await downloadCSV(payload); const url = window.URL.createObjectURL(new Blob([response.data])); const link = document.createElement('a'); link.href = url; const filename = `precificacao_calculada_${prazoAnos}anos_${taxaJuros}juros.csv`; link.setAttribute('download', filename); document.body.appendChild(link); link.click(); link.parentNode.removeChild(link); window.URL.revokeObjectURL(url); toast.success('Download iniciado!', { id: loadingToast }); } catch (err) { toast.error("Falha ao gerar o arquivo para download.", { id: loadingToast }); } };
   const handleSelectAll = () => { const allVisibleLoteIds = filteredLotes.map(lote => lote.UNIDADE); setSelectionModel(allVisibleLoteIds); };
   const handleClearSelection = () => { setSelectionModel([]); };
-  const handleMergeUpload = async (file) => { setIsLoading(true); const loadingToast = toast.loading('Combinando planilhas...'); try { const response = await mergeEntradasCSV(lotes, file); pushToHistory(lotes); setLotes(response.data); setTemColunaEntrada(true); toast.success('Valores de entrada combinados com sucesso!', { id: loadingToast }); } catch (err) { const errorMessage = err.response?.data?.detail || "Erro desconhecido."; setError(errorMessage); toast.error(`Erro: ${errorMessage}`, { id: loadingToast }); } finally { setIsLoading(false); } };
+  const handleMergeUpload = async (file) => { setIsLoading(true); const loadingToast = toast.loading('Combinando planilhas...'); try { const response = await mergeEntradasCSV(lotes, file, nomesOriginais); pushToHistory(lotes); setLotes(response.data); setNomesOriginais(lerNomesOriginais(response) || nomesOriginais); setTemColunaEntrada(true); toast.success('Valores de entrada combinados com sucesso!', { id: loadingToast }); } catch (err) { const errorMessage = err.response?.data?.detail || "Erro desconhecido."; setError(errorMessage); toast.error(`Erro: ${errorMessage}`, { id: loadingToast }); } finally { setIsLoading(false); } };
 
   return (
     <>
@@ -9,6 +9,7 @@ const apiClient = axios.create({
   baseURL: API_URL,
 });
 
+// Os cabeçalhos originais da planilha vêm no X-Nomes-Originais; o download os usa no CSV
 export const uploadLotesCSV = (file) => {
   const formData = new FormData();
   formData.append('file', file);
@@ -32,10 +33,12 @@ export const downloadCSV = (payload) => {
 };
 
 // --- FUNÇÃO QUE ESTAVA FALTANDO ---
-export const mergeEntradasCSV = (lotes, file) => {
+// Os cabeçalhos originais atualizados pelo merge voltam no X-Nomes-Originais
+export const mergeEntradasCSV = (lotes, file, nomesOriginais) => {
   const formData = new FormData();
   formData.append('file', file);
   formData.append('lotes_atuais', JSON.stringify(lotes));
+  if (nomesOriginais) formData.append('nomes_originais', JSON.stringify(nomesOriginais));
 
   return apiClient.post('/merge_entradas', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },